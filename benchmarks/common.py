@@ -0,0 +1,17 @@
+"""
+Helpers shared by the benchmark tools.
+
+Kept free of the detector, torch and ultralytics imports, so a tool only
+loads what it measures.
+"""
+
+import subprocess
+
+
+def git_commit():
+    """Return the current git commit hash, or 'unknown' outside a repository."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
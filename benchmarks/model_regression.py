@@ -0,0 +1,255 @@
+"""
+Accuracy and latency regression check for candidate vespCV models.
+
+Evaluates a candidate model artifact (.pt weights, INT8 export, ...) and the
+currently deployed model on the field frames in data/yolo_jpg_txt, using the
+YOLO .txt labels written by save_original_image as ground truth. Reports
+per-class precision/recall at the configured conf_threshold, Vespa velutina
+recall and per-frame latency, and exits non-zero with a verdict when the
+candidate is less accurate or slower than the current model.
+
+Usage (from the repository root):
+    python -m benchmarks.model_regression --candidate runs/detect/train/weights/best.pt
+    python -m benchmarks.model_regression --candidate best_int8_openvino_model/ --max-slowdown 0.0
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+from src.core.config_loader import load_config
+from src.utils.box_utils import iou_matrix
+from src.utils.detection_utils import read_yolo_labels
+
+from benchmarks.common import git_commit
+
+PRIORITY_CLASS = 'vvel'
+
+
+def load_labelled_set(data_dir, limit=None):
+    """Return (image path, labels) pairs for frames that have a .txt label file.
+
+    Labels are an (N, 5) array of class id and normalized xyxy box.
+    """
+    samples = []
+    for image_path in sorted(glob.glob(os.path.join(data_dir, '*.jpg'))):
+        txt_path = os.path.splitext(image_path)[0] + '.txt'
+        if not os.path.exists(txt_path):
+            continue
+        labels = np.asarray(read_yolo_labels(txt_path), dtype=np.float32).reshape(-1, 5)
+        boxes = np.concatenate([labels[:, 1:3] - labels[:, 3:5] / 2, labels[:, 1:3] + labels[:, 3:5] / 2], axis=1)
+        samples.append((image_path, np.concatenate([labels[:, :1], boxes], axis=1)))
+        if limit and len(samples) >= limit:
+            break
+    return samples
+
+
+def match_frame(labels, predictions, class_count, iou_threshold):
+    """Count true positives, false positives and false negatives per class for one frame.
+
+    Predictions are matched greedily by confidence to unmatched labels of the
+    same class with IoU above iou_threshold.
+
+    Args:
+        labels: (N, 5) array of class id and normalized xyxy box
+        predictions: (M, 6) array of normalized xyxy box, confidence and class id
+        class_count: Number of classes
+        iou_threshold: Minimum IoU for a match
+
+    Returns:
+        np.ndarray: (class_count, 3) array of TP, FP, FN counts
+    """
+    counts = np.zeros((class_count, 3), dtype=np.int64)
+    for class_id in range(class_count):
+        truth = labels[labels[:, 0] == class_id, 1:5]
+        found = predictions[predictions[:, 5] == class_id]
+        found = found[np.argsort(-found[:, 4])]
+        if len(truth) and len(found):
+            overlaps = iou_matrix(found[:, :4], truth)
+            matched = np.zeros(len(truth), dtype=bool)
+            for row in overlaps:
+                candidates = np.where(~matched & (row >= iou_threshold))[0]
+                if len(candidates):
+                    matched[candidates[np.argmax(row[candidates])]] = True
+            true_positives = int(matched.sum())
+        else:
+            true_positives = 0
+        counts[class_id] = (true_positives, len(found) - true_positives, len(truth) - true_positives)
+    return counts
+
+
+def latency_summary(latencies):
+    """Return mean and p50/p95/p99 of a list of latencies in seconds, in ms."""
+    values_ms = np.asarray(latencies) * 1000
+    return {
+        'count': len(values_ms),
+        'mean_ms': float(values_ms.mean()),
+        'p50_ms': float(np.percentile(values_ms, 50)),
+        'p95_ms': float(np.percentile(values_ms, 95)),
+        'p99_ms': float(np.percentile(values_ms, 99)),
+    }
+
+
+def evaluate(model_path, samples, class_names, conf_threshold, imgsz=None, iou_threshold=0.5, warmup=3):
+    """Run a model frame by frame, as the detector does, and score it against the labels.
+
+    Returns:
+        dict: Per-class and overall precision/recall, vvel recall (box and frame level) and latency
+    """
+    model = YOLO(model_path, task='detect')
+    kwargs = {'verbose': False, 'conf': conf_threshold}
+    if imgsz:
+        kwargs['imgsz'] = imgsz
+
+    counts = np.zeros((len(class_names), 3), dtype=np.int64)
+    priority_id = class_names.index(PRIORITY_CLASS)
+    vvel_frames = vvel_frames_found = 0
+    latencies = []
+    for index, (image_path, labels) in enumerate(samples):
+        img = cv2.imread(image_path)
+        if img is None:
+            continue
+        start = time.perf_counter()
+        result = model(img, **kwargs)[0]
+        elapsed = time.perf_counter() - start
+        if index >= warmup:
+            latencies.append(elapsed)
+
+        data = result.boxes.data.cpu().numpy().astype(np.float32)
+        height, width = result.orig_shape
+        predictions = data[data[:, 4] > conf_threshold]
+        predictions[:, :4] /= [width, height, width, height]
+        counts += match_frame(labels, predictions, len(class_names), iou_threshold)
+
+        if (labels[:, 0] == priority_id).any():
+            vvel_frames += 1
+            vvel_frames_found += int((predictions[:, 5] == priority_id).any())
+
+    per_class = {}
+    for class_id, name in enumerate(class_names):
+        true_positives, false_positives, false_negatives = (int(value) for value in counts[class_id])
+        per_class[name] = {
+            'labels': true_positives + false_negatives,
+            'precision': true_positives / max(true_positives + false_positives, 1),
+            'recall': true_positives / max(true_positives + false_negatives, 1),
+        }
+    total_tp, total_fp, total_fn = (int(value) for value in counts.sum(axis=0))
+    return {
+        'model': model_path,
+        'frames': len(samples),
+        'precision': total_tp / max(total_tp + total_fp, 1),
+        'recall': total_tp / max(total_tp + total_fn, 1),
+        'vvel_recall': per_class[PRIORITY_CLASS]['recall'],
+        'vvel_frame_recall': vvel_frames_found / max(vvel_frames, 1),
+        'per_class': per_class,
+        'latency': latency_summary(latencies or [0.0]),
+    }
+
+
+def verdict(candidate, baseline, max_recall_drop, max_precision_drop, max_slowdown):
+    """Compare a candidate against the baseline.
+
+    Returns:
+        list: Reasons the candidate fails; empty when it may be deployed
+    """
+    failures = []
+    for key in ('vvel_recall', 'vvel_frame_recall', 'recall'):
+        drop = baseline[key] - candidate[key]
+        if drop > max_recall_drop:
+            failures.append(f"{key} dropped {drop:.3f} ({baseline[key]:.3f} -> {candidate[key]:.3f})")
+    drop = baseline['precision'] - candidate['precision']
+    if drop > max_precision_drop:
+        failures.append(f"precision dropped {drop:.3f} ({baseline['precision']:.3f} -> {candidate['precision']:.3f})")
+    for name, stats in baseline['per_class'].items():
+        if not stats['labels']:
+            continue
+        drop = stats['recall'] - candidate['per_class'][name]['recall']
+        if drop > max_recall_drop:
+            failures.append(f"{name} recall dropped {drop:.3f}")
+
+    base_p95, candidate_p95 = baseline['latency']['p95_ms'], candidate['latency']['p95_ms']
+    if base_p95 and candidate_p95 > base_p95 * (1 + max_slowdown):
+        failures.append(f"p95 latency {candidate_p95:.1f} ms is more than {100 * max_slowdown:.0f}% "
+                        f"above {base_p95:.1f} ms")
+    return failures
+
+
+def print_report(candidate, baseline, failures):
+    """Print the per-class table of both models and the verdict."""
+    print(f"{'class':<10}{'labels':>8}{'P base':>9}{'P cand':>9}{'R base':>9}{'R cand':>9}")
+    for name, stats in baseline['per_class'].items():
+        other = candidate['per_class'][name]
+        print(f"{name:<10}{stats['labels']:>8}{stats['precision']:>9.3f}{other['precision']:>9.3f}"
+              f"{stats['recall']:>9.3f}{other['recall']:>9.3f}")
+    for key in ('precision', 'recall', 'vvel_recall', 'vvel_frame_recall'):
+        print(f"{key:<18}{baseline[key]:>9.3f}{candidate[key]:>9.3f}{candidate[key] - baseline[key]:>+9.3f}")
+    for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+        base, other = baseline['latency'][key], candidate['latency'][key]
+        print(f"latency {key:<10}{base:>9.1f}{other:>9.1f}{other - base:>+9.1f}")
+    if failures:
+        print("FAIL: candidate is worse than the current model")
+        for failure in failures:
+            print(f"  - {failure}")
+    else:
+        print("PASS: candidate is at least as accurate and fast as the current model")
+
+
+def main():
+    config = load_config()
+
+    parser = argparse.ArgumentParser(description="Check a candidate vespCV model against the current model on field data.")
+    parser.add_argument('--candidate', required=True, help="Candidate model (.pt weights or exported model)")
+    parser.add_argument('--baseline', default=config['model_path'], help="Current model (default: model_path from config)")
+    parser.add_argument('--data-dir', default=os.path.join('data', 'yolo_jpg_txt'), help="Labelled image/.txt pairs")
+    parser.add_argument('--conf', type=float, default=config['conf_threshold'], help="Confidence threshold (default: conf_threshold)")
+    parser.add_argument('--imgsz', type=int, help="Inference image size (default: model default)")
+    parser.add_argument('--iou', type=float, default=0.5, help="IoU needed to match a label")
+    parser.add_argument('--limit', type=int, help="Evaluate at most this many frames")
+    parser.add_argument('--max-recall-drop', type=float, default=0.02, help="Largest acceptable recall drop")
+    parser.add_argument('--max-precision-drop', type=float, default=0.02, help="Largest acceptable precision drop")
+    parser.add_argument('--max-slowdown', type=float, default=0.10, help="Largest acceptable relative p95 latency increase")
+    parser.add_argument('--output', help="JSON output path (default: benchmarks/results/regression-<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    samples = load_labelled_set(args.data_dir, args.limit)
+    if not samples:
+        print(f"No labelled frames found in {args.data_dir}")
+        return 2
+
+    class_names = config['class_names']
+    baseline = evaluate(args.baseline, samples, class_names, args.conf, args.imgsz, args.iou)
+    candidate = evaluate(args.candidate, samples, class_names, args.conf, args.imgsz, args.iou)
+    failures = verdict(candidate, baseline, args.max_recall_drop, args.max_precision_drop, args.max_slowdown)
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'data_dir': args.data_dir,
+        'conf_threshold': args.conf,
+        'imgsz': args.imgsz,
+        'baseline': baseline,
+        'candidate': candidate,
+        'failures': failures,
+        'passed': not failures,
+    }
+    output = args.output or os.path.join(
+        'benchmarks', 'results', f"regression-{report['commit']}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{len(samples)} labelled frames from {args.data_dir}, conf_threshold {args.conf}")
+    print_report(candidate, baseline, failures)
+    print(f"Results written to {output}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
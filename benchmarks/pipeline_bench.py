@@ -0,0 +1,334 @@
+"""
+End-to-end pipeline benchmark for the vespCV detector.
+
+Runs DetectionController's processing path on stored frames with a replay
+camera, a fake GPIO controller and no GUI. Reports p50/p95/p99 latency per
+stage, throughput, peak and steady-state RSS, and writes the results as JSON
+so runs can be compared across commits, model backends and image sizes.
+
+Usage (from the repository root):
+    python -m benchmarks.pipeline_bench --frames-dir data/yolo_jpg_txt --iterations 50
+    python -m benchmarks.pipeline_bench --frames-dir data/yolo_jpg_txt --compare benchmarks/results/old.json
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+from collections import defaultdict
+
+import cv2
+import numpy as np
+import torch
+
+from benchmarks.common import git_commit
+import src.core.detector as detector_module
+import src.utils.detection_utils as detection_utils
+from src.core.config_loader import load_config
+from src.core.detector import DetectionController
+from src.core.logger import logger
+from src.core.resources import apply_resource_budget, pin_current_thread
+from src.utils.frame_pool import frame_pool
+from src.utils.image_utils import ImageHandler
+
+# Stages in pipeline order; nested stages are indented in the report
+STAGES = [
+    'capture', 'decode', 'inference', 'postprocess', 'track', 'draw', 'save_original', '  csv_log',
+    'preview', 'save_annotated', 'save_archived', 'gui_update', 'total',
+]
+
+
+class ReplayCamera:
+    """Camera replacement that replays stored frames in a loop."""
+
+    def __init__(self, frames_dir, images_folder):
+        self.frames = sorted(
+            path for path in glob.glob(os.path.join(frames_dir, '*'))
+            if path.lower().endswith(('.jpg', '.jpeg', '.png'))
+        )
+        if not self.frames:
+            raise FileNotFoundError(f"No frames found in {frames_dir}")
+        self.output_path = os.path.join(images_folder, 'image_for_detection.jpg')
+        self._index = 0
+
+    def capture(self):
+        """Write the next stored frame to the path the camera would write to."""
+        source = self.frames[self._index % len(self.frames)]
+        self._index += 1
+        shutil.copyfile(source, self.output_path)
+        return self.output_path
+
+
+class FakeGPIO:
+    """GPIO controller replacement that only counts activations."""
+
+    def __init__(self):
+        self.enabled = True
+        self.activations = 0
+
+    def handle_detection(self):
+        self.activations += 1
+
+    def check_and_turn_off(self):
+        pass
+
+    def cleanup(self):
+        pass
+
+
+class StageTimer:
+    """Collects wall-clock durations per stage."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.enabled = False
+
+    def wrap(self, name, func):
+        """Return func wrapped so that each call is timed under name."""
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if self.enabled:
+                    self.samples[name].append(time.perf_counter() - start)
+        return timed
+
+    def summary(self):
+        """Return count, mean and p50/p95/p99 in milliseconds per stage."""
+        report = {}
+        for name in STAGES:
+            values = self.samples.get(name.strip())
+            if not values:
+                continue
+            values_ms = np.asarray(values) * 1000
+            report[name.strip()] = {
+                'count': len(values_ms),
+                'mean_ms': float(values_ms.mean()),
+                'p50_ms': float(np.percentile(values_ms, 50)),
+                'p95_ms': float(np.percentile(values_ms, 95)),
+                'p99_ms': float(np.percentile(values_ms, 99)),
+            }
+        return report
+
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def current_rss_mb():
+    """Return the current resident set size of this process in MB."""
+    with open('/proc/self/statm') as f:
+        resident_pages = int(f.read().split()[1])
+    return resident_pages * resource.getpagesize() / (1024 * 1024)
+
+
+def memory_summary(rss_samples):
+    """Summarize the RSS after each measured frame.
+
+    The steady state is the second half of the run; its slope shows whether
+    memory keeps growing over long runs.
+    """
+    rss = np.asarray(rss_samples)
+    steady = rss[len(rss) // 2:]
+    slope = np.polyfit(np.arange(len(steady)), steady, 1)[0] if len(steady) > 1 else 0.0
+    return {
+        'first_rss_mb': float(rss[0]),
+        'steady_rss_mb': float(np.median(steady)),
+        'max_cycle_rss_mb': float(rss.max()),
+        'growth_mb_per_100_frames': float(slope * 100),
+        'frame_pool': frame_pool.get_stats(),
+    }
+
+
+def build_controller(config, timer, camera):
+    """Create a DetectionController with timed stages, the replay camera and a fake GPIO."""
+    # Module-level functions are looked up by name at call time, so patch them in place
+    detector_module.capture_image = timer.wrap('capture', camera.capture)
+    detector_module.draw_detections = timer.wrap('draw', detector_module.draw_detections)
+    detector_module.save_original_image = timer.wrap('save_original', detector_module.save_original_image)
+    detector_module.render_annotated_preview = timer.wrap('preview', detector_module.render_annotated_preview)
+    detector_module.save_annotated_image = timer.wrap('save_annotated', detector_module.save_annotated_image)
+    detector_module.save_archived_image = timer.wrap('save_archived', detector_module.save_archived_image)
+    detection_utils.log_detection_data = timer.wrap('csv_log', detection_utils.log_detection_data)
+
+    controller = DetectionController(led_controller=FakeGPIO(), config=config)
+    controller._decode_image = timer.wrap('decode', controller._decode_image)
+    controller._run_inference = timer.wrap('inference', controller._run_inference)
+    controller._process_detections = timer.wrap('postprocess', controller._process_detections)
+    controller._track_detections = timer.wrap('track', controller._track_detections)
+    controller._process_single_frame = timer.wrap('total', controller._process_single_frame)
+    return controller
+
+
+def resource_overrides(config, args):
+    """Return the resources section with the command line overrides applied."""
+    if args.default_threads:
+        return {}
+    resources = dict(config.get('resources') or {})
+    for key in ('torch_threads', 'torch_interop_threads', 'opencv_threads'):
+        value = getattr(args, key)
+        if value is not None:
+            resources[key] = value
+    if args.inference_cpus:
+        resources['inference_cpus'] = [int(cpu) for cpu in args.inference_cpus.split(',')]
+    return resources
+
+
+def make_gui_update(timer):
+    """Return a result callback that does the image work of the GUI update without Tk."""
+    handler = ImageHandler(logger)
+
+    def gui_update(result):
+        annotated_path = result.get("annotated_path") if result else None
+        if annotated_path:
+            handler.load_and_resize_image(annotated_path, (640, 480))
+
+    return timer.wrap('gui_update', gui_update)
+
+
+def run(args):
+    """Run the benchmark and return the report dictionary."""
+    config = load_config(args.config)
+    config['model_path'] = os.path.abspath(args.model or config['model_path'])
+    config['burst'] = {'enabled': False}
+    config['governor'] = {'enabled': False}
+    config['retention'] = {'enabled': False}
+    config['dedup'] = {'enabled': False}
+    config['archive'] = {'enabled': False}
+    config['sampling'] = {'enabled': False}
+    config['timeseries'] = {'enabled': False}
+    config['dashboard'] = {'enabled': False}
+    if args.cascade:
+        config.setdefault('cascade', {})['enabled'] = True
+    config['resources'] = resource_overrides(config, args)
+    frames_dir = os.path.abspath(args.frames_dir)
+
+    # Run in a scratch directory so the relative data/ outputs don't touch the real archive
+    repo_root = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix='vespcv_bench_')
+    os.chdir(work_dir)
+    try:
+        config['images_folder'] = os.path.join(work_dir, 'images')
+        for path in (config['images_folder'], os.path.join('data', 'logs'), os.path.join('data', 'yolo_jpg_txt')):
+            os.makedirs(path, exist_ok=True)
+
+        # Frames are processed on this thread, so it plays the inference thread
+        budget = apply_resource_budget(config)
+        pin_current_thread(budget['inference_cpus'])
+
+        timer = StageTimer()
+        camera = ReplayCamera(frames_dir, config['images_folder'])
+        controller = build_controller(config, timer, camera)
+        if args.imgsz:
+            controller._inference_kwargs = lambda: {'imgsz': args.imgsz}
+        gui_update = make_gui_update(timer)
+
+        for _ in range(args.warmup):
+            controller._process_single_frame()
+
+        timer.enabled = True
+        start = time.perf_counter()
+        rss_samples = []
+        for _ in range(args.iterations):
+            gui_update(controller._process_single_frame())
+            rss_samples.append(current_rss_mb())
+        elapsed = time.perf_counter() - start
+    finally:
+        os.chdir(repo_root)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    sample = camera.frames[0]
+    return {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'model': config['model_path'],
+        'backend': os.path.splitext(config['model_path'].rstrip('/'))[1] or 'dir',
+        'imgsz': args.imgsz,
+        'cascade': bool(args.cascade),
+        'resources': {
+            **budget,
+            'applied_torch_threads': torch.get_num_threads(),
+            'applied_torch_interop_threads': torch.get_num_interop_threads(),
+            'applied_opencv_threads': cv2.getNumThreads(),
+        },
+        'frame': os.path.basename(sample),
+        'frame_count': len(camera.frames),
+        'iterations': args.iterations,
+        'throughput_fps': args.iterations / elapsed if elapsed else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+        'memory': memory_summary(rss_samples),
+        'stages': timer.summary(),
+    }
+
+
+def print_report(report, baseline=None):
+    """Print the per-stage table, with the relative change against a baseline report."""
+    print(f"commit {report['commit']}  model {report['model']}  imgsz {report['imgsz'] or 'default'}")
+    resources = report['resources']
+    print(f"threads: torch {resources['applied_torch_threads']} intra-op / "
+          f"{resources['applied_torch_interop_threads']} inter-op, OpenCV {resources['applied_opencv_threads']}, "
+          f"inference cores {resources['inference_cpus'] or 'all'}")
+    header = f"{'stage':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header + (f"{'p50 vs base':>14}" if baseline else ''))
+    for name in STAGES:
+        stage = report['stages'].get(name.strip())
+        if stage is None:
+            continue
+        line = f"{name:<16}{stage['p50_ms']:>10.1f}{stage['p95_ms']:>10.1f}{stage['p99_ms']:>10.1f}"
+        base = baseline['stages'].get(name.strip()) if baseline else None
+        if base and base['p50_ms']:
+            line += f"{100 * (stage['p50_ms'] / base['p50_ms'] - 1):>+13.1f}%"
+        print(line)
+    print(f"throughput {report['throughput_fps']:.2f} frames/s, peak RSS {report['peak_rss_mb']:.0f} MB")
+    memory = report['memory']
+    print(f"RSS first frame {memory['first_rss_mb']:.0f} MB, steady state {memory['steady_rss_mb']:.0f} MB, "
+          f"growth {memory['growth_mb_per_100_frames']:+.1f} MB/100 frames; frame pool "
+          f"{memory['frame_pool']['reuses']} reuses, {memory['frame_pool']['allocations']} allocations")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vespCV detection pipeline on stored frames.")
+    parser.add_argument('--frames-dir', required=True, help="Folder with stored frames to replay")
+    parser.add_argument('--config', default='config/config.yaml', help="Configuration file")
+    parser.add_argument('--model', help="Model to benchmark (default: model_path from config)")
+    parser.add_argument('--imgsz', type=int, help="Inference image size (default: model default)")
+    parser.add_argument('--cascade', action='store_true', help="Enable the two-stage cascade")
+    parser.add_argument('--torch-threads', type=int, help="Override resources.torch_threads")
+    parser.add_argument('--torch-interop-threads', type=int, help="Override resources.torch_interop_threads")
+    parser.add_argument('--opencv-threads', type=int, help="Override resources.opencv_threads")
+    parser.add_argument('--inference-cpus', help="Override resources.inference_cpus, e.g. 1,2,3")
+    parser.add_argument('--default-threads', action='store_true',
+                        help="Ignore the resources section and use the library defaults (baseline)")
+    parser.add_argument('--iterations', type=int, default=20, help="Measured frames")
+    parser.add_argument('--warmup', type=int, default=2, help="Unmeasured warm-up frames")
+    parser.add_argument('--output', help="JSON output path (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument('--compare', help="Earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    args.config = os.path.abspath(args.config)
+    report = run(args)
+
+    output = args.output or os.path.join(
+        'benchmarks', 'results', f"{report['commit']}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""
+Archive tier for old detection frames.
+
+Thousands of separate 16 MP JPEGs and tiny .txt files fragment the SD card
+and slow down directory listings. The archive tier periodically packs frames
+older than pack_after_days into append-only tar shards in data/archive and
+removes the loose files. An offset index (index.csv) gives random access to
+every packed file without reading the tar headers. Older tiers can be
+re-encoded at a lower JPEG quality or resolution; YOLO labels are
+normalized, so they stay valid. Packed frames can be exported back to a
+plain YOLO directory layout.
+
+Usage:
+    python -m src.core.archive pack
+    python -m src.core.archive export --output data/export
+"""
+
+import io
+import os
+import time
+import tarfile
+import argparse
+import threading
+
+import cv2
+import numpy as np
+
+from src.core.logger import logger
+from src.core.metrics import metrics
+
+class FrameArchive:
+    def __init__(self, config, retention=None):
+        """Initialize the archive and load its offset index.
+
+        Args:
+            config: Application configuration dictionary with an 'archive' section
+            retention: Optional RetentionManager that is told about packed files
+        """
+        archive_config = config.get('archive', {})
+        self.directory = archive_config.get('directory', os.path.join('data', 'archive'))
+        self.pack_after = archive_config.get('pack_after_days', 14) * 86400
+        self.pack_interval = archive_config.get('pack_interval', 86400)
+        self.shard_max_bytes = archive_config.get('shard_max_mb', 512) * 1024**2
+        self.compact_below = archive_config.get('compact_below', 0.5)
+        self.keep_unpacked = set(archive_config.get('keep_unpacked_classes', ['vvel']))
+        self.tiers = sorted(archive_config.get('tiers', [{'after_days': 14, 'quality': None, 'max_size': None}]),
+                            key=lambda tier: tier['after_days'])
+        self.sources = {'yolo_jpg_txt': os.path.join('data', 'yolo_jpg_txt'), 'images': config['images_folder']}
+        self.retention = retention
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.index_path = os.path.join(self.directory, 'index.csv')
+        self.entries = {}  # archive name -> (shard, offset, size, tier, timestamp)
+        self._lock = threading.Lock()
+        self._load_index()
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _load_index(self):
+        """Read the offset index; later lines replace earlier ones for the same name."""
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'r') as f:
+            for line in f:
+                name, shard, offset, size, tier, timestamp = line.rstrip('\n').rsplit(',', 5)
+                self.entries[name] = (shard, int(offset), int(size), int(tier), float(timestamp))
+
+    def read(self, name):
+        """Return the bytes of a packed file, e.g. 'yolo_jpg_txt/vcra-0.91-20250601-101500.jpg'."""
+        shard, offset, size, _, _ = self.entries[name]
+        with open(os.path.join(self.directory, shard), 'rb') as f:
+            f.seek(offset)
+            return f.read(size)
+
+    def start(self):
+        """Pack old frames periodically in a background thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="archive")
+            self._thread.start()
+            logger.info(f"Archive tier started (packing frames older than {self.pack_after / 86400:.0f} days)")
+
+    def stop(self):
+        """Stop the background thread."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        """Pack and repack until stopped."""
+        while not self._stop_event.wait(self.pack_interval):
+            try:
+                self.pack()
+                self.repack()
+            except Exception as e:
+                logger.error(f"Error in archive tier: {e}")
+
+    def _tier_for_age(self, age):
+        """Return the index of the oldest tier whose after_days the age has passed."""
+        tier_index = 0
+        for index, tier in enumerate(self.tiers):
+            if age >= tier['after_days'] * 86400:
+                tier_index = index
+        return tier_index
+
+    def _encode(self, data, tier_index, name):
+        """Re-encode a JPEG for a tier; other files and untouched tiers keep their bytes."""
+        tier = self.tiers[tier_index]
+        if not name.endswith('.jpg') or (tier.get('quality') is None and tier.get('max_size') is None):
+            return data
+        img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            return data
+        max_size = tier.get('max_size')
+        height, width = img.shape[:2]
+        if max_size and max(height, width) > max_size:
+            scale = max_size / max(height, width)
+            img = cv2.resize(img, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, tier.get('quality') or 95])
+        return encoded.tobytes() if ok else data
+
+    def _current_shard(self, exclude=()):
+        """Return the name of the shard to append to, starting a new one when it is full or excluded."""
+        shards = sorted(name for name in os.listdir(self.directory)
+                        if name.startswith('shard-') and name.endswith('.tar'))
+        if (shards and shards[-1] not in exclude
+                and os.path.getsize(os.path.join(self.directory, shards[-1])) < self.shard_max_bytes):
+            return shards[-1]
+        number = int(shards[-1][6:-4]) + 1 if shards else 1
+        return f"shard-{number:05d}.tar"
+
+    def _append(self, files, exclude=()):
+        """Append (archive name, bytes, tier, timestamp) tuples to the current shard and index them.
+
+        The tar member is written before the index line, so an interruption
+        never leaves an index entry without data. Shards in exclude are never
+        appended to.
+        """
+        shard = self._current_shard(exclude)
+        shard_path = os.path.join(self.directory, shard)
+        with tarfile.open(shard_path, 'a' if os.path.exists(shard_path) else 'w') as tar, \
+                open(self.index_path, 'a') as index:
+            for name, data, tier, timestamp in files:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = timestamp
+                tar.addfile(info, io.BytesIO(data))
+                tar.fileobj.flush()
+                # The data ends at the current tar offset, padded to whole 512-byte blocks
+                offset = tar.offset - -(-len(data) // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+                index.write(f"{name},{shard},{offset},{len(data)},{tier},{timestamp:.0f}\n")
+                with self._lock:
+                    self.entries[name] = (shard, offset, len(data), tier, timestamp)
+        return shard
+
+    def pack(self, now=None):
+        """Pack loose frames older than pack_after_days and remove them.
+
+        Returns:
+            int: Number of frames packed
+        """
+        now = time.time() if now is None else now
+        packed = 0
+        bytes_before = bytes_after = 0
+        for prefix, directory in self.sources.items():
+            if not os.path.isdir(directory):
+                continue
+            for entry in os.scandir(directory):
+                name = entry.name
+                if not name.endswith('.jpg') or name.startswith(('_', 'image_', 'burst_')):
+                    continue
+                if name.split('-')[0] in self.keep_unpacked:
+                    continue
+                timestamp = entry.stat().st_mtime
+                if now - timestamp < self.pack_after:
+                    continue
+
+                tier = self._tier_for_age(now - timestamp)
+                paths = [entry.path]
+                txt_path = os.path.splitext(entry.path)[0] + '.txt'
+                if os.path.exists(txt_path):
+                    paths.append(txt_path)
+                files = []
+                for path in paths:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                    bytes_before += len(data)
+                    encoded = self._encode(data, tier, path)
+                    bytes_after += len(encoded)
+                    files.append((f"{prefix}/{os.path.basename(path)}", encoded, tier, timestamp))
+                self._append(files)
+
+                for path in paths:
+                    os.remove(path)
+                if self.retention is not None:
+                    self.retention.unregister(entry.path)
+                packed += 1
+
+        if packed:
+            metrics.inc('archive_packed_frames_total', packed)
+            logger.info(f"Archive packed {packed} frames: {bytes_before / 1024**2:.0f} MB -> "
+                        f"{bytes_after / 1024**2:.0f} MB in {self.directory}")
+        return packed
+
+    def repack(self, now=None):
+        """Move files into the next tier once they are old enough, and compact mostly dead shards.
+
+        Re-encoded files are never appended to a shard they are read from, and
+        a shard whose live entries fill less than compact_below of it has them
+        copied to a new shard, so the replaced bytes are freed.
+
+        Returns:
+            int: Number of files re-encoded
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            due = [(name, entry) for name, entry in self.entries.items()
+                   if self._tier_for_age(now - entry[4]) > entry[3]]
+        moved_from = {entry[0] for _, entry in due}
+        for start in range(0, len(due), 50):
+            files = []
+            for name, (_, _, _, _, timestamp) in due[start:start + 50]:
+                tier = self._tier_for_age(now - timestamp)
+                files.append((name, self._encode(self.read(name), tier, name), tier, timestamp))
+            self._append(files, exclude=moved_from)
+
+        sparse = self._sparse_shards()
+        with self._lock:
+            remaining = [(name, entry) for name, entry in self.entries.items() if entry[0] in sparse]
+        for start in range(0, len(remaining), 50):
+            files = [(name, self.read(name), tier, timestamp)
+                     for name, (_, _, _, tier, timestamp) in remaining[start:start + 50]]
+            self._append(files, exclude=sparse)
+
+        # Shards without live entries are deleted once the index no longer refers to them
+        with self._lock:
+            live_shards = {entry[0] for entry in self.entries.values()}
+        dead_shards = (moved_from | sparse) - live_shards
+        if dead_shards:
+            self._rewrite_index()
+            for shard in dead_shards:
+                os.remove(os.path.join(self.directory, shard))
+            logger.info(f"Archive repacked {len(due)} files into older tiers, compacted {len(remaining)} files, "
+                        f"removed {len(dead_shards)} shards")
+        return len(due)
+
+    def _sparse_shards(self):
+        """Return the shards whose live entries (with their tar headers) fill less than compact_below of them."""
+        live_bytes = {}
+        with self._lock:
+            for shard, _, size, _, _ in self.entries.values():
+                blocks = 1 + -(-size // tarfile.BLOCKSIZE)
+                live_bytes[shard] = live_bytes.get(shard, 0) + blocks * tarfile.BLOCKSIZE
+        sparse = set()
+        for shard, size in live_bytes.items():
+            path = os.path.join(self.directory, shard)
+            # The end-of-archive padding of up to one record is never live
+            if os.path.exists(path) and size < self.compact_below * (os.path.getsize(path) - tarfile.RECORDSIZE):
+                sparse.add(shard)
+        return sparse
+
+    def _rewrite_index(self):
+        """Write the index with only the live entries."""
+        temp_path = f"{self.index_path}.tmp"
+        with self._lock, open(temp_path, 'w') as f:
+            for name, (shard, offset, size, tier, timestamp) in self.entries.items():
+                f.write(f"{name},{shard},{offset},{size},{tier},{timestamp:.0f}\n")
+        os.replace(temp_path, self.index_path)
+
+    def export(self, output_dir, prefix='yolo_jpg_txt'):
+        """Write packed frames back to a plain YOLO layout (images/ and labels/).
+
+        Returns:
+            int: Number of images exported
+        """
+        images_dir = os.path.join(output_dir, 'images')
+        labels_dir = os.path.join(output_dir, 'labels')
+        os.makedirs(images_dir, exist_ok=True)
+        os.makedirs(labels_dir, exist_ok=True)
+        exported = 0
+        for name in sorted(self.entries):
+            if not name.startswith(f"{prefix}/"):
+                continue
+            target_dir = labels_dir if name.endswith('.txt') else images_dir
+            with open(os.path.join(target_dir, os.path.basename(name)), 'wb') as f:
+                f.write(self.read(name))
+            exported += name.endswith('.jpg')
+        return exported
+
+
+def main():
+    """Command line entry point to pack old frames or export the archive."""
+    from src.core.config_loader import load_config
+    config = load_config()
+
+    parser = argparse.ArgumentParser(description="Pack old vespCV frames into shards or export them.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('pack', help="Pack frames older than archive.pack_after_days now")
+    export_parser = subparsers.add_parser('export', help="Export packed frames to a YOLO directory layout")
+    export_parser.add_argument('--output', required=True, help="Output directory (images/ and labels/)")
+    args = parser.parse_args()
+
+    archive = FrameArchive(config)
+    if args.command == 'pack':
+        print(f"Packed {archive.pack()} frames, re-encoded {archive.repack()} files into older tiers")
+    else:
+        print(f"Exported {archive.export(args.output)} images to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Two-stage detection cascade for the vespCV application.
+
+A screener model runs on a downscaled frame. Only when it proposes a
+hornet-like candidate does the full model run, on full-resolution crops
+around the candidates.
+"""
+
+import time
+
+import cv2
+import numpy as np
+import torch
+from ultralytics import YOLO
+from ultralytics.engine.results import Results
+
+from src.core.logger import logger
+from src.utils.box_utils import expand_boxes, nms
+from src.utils.frame_pool import frame_pool
+
+DEFAULT_CANDIDATE_CLASSES = ['vcra', 'vespsp', 'vvel']
+
+
+class CascadeDetector:
+    def __init__(self, full_model, config):
+        """Initialize the cascade.
+
+        Args:
+            full_model: Loaded YOLO model used for the second stage
+            config: Application configuration dictionary with a 'cascade' section
+        """
+        cascade_config = config.get('cascade', {})
+        self.full_model = full_model
+        self.class_names = config['class_names']
+        self.names = dict(enumerate(self.class_names))
+
+        # Without a dedicated screener the full weights are used at low resolution
+        screener_path = cascade_config.get('screener_model_path')
+        self.screener = YOLO(screener_path, task='detect') if screener_path else full_model
+        self.screener_imgsz = cascade_config.get('screener_imgsz', 320)
+        self.screener_conf = cascade_config.get('screener_conf', 0.25)
+        self.full_imgsz = cascade_config.get('full_imgsz', 640)
+        self.crop_padding = cascade_config.get('crop_padding', 0.5)
+        self.min_crop_size = cascade_config.get('min_crop_size', 640)
+        self.nms_iou = cascade_config.get('nms_iou', 0.5)
+        self.log_every = cascade_config.get('log_every', 20)
+        candidate_classes = cascade_config.get('candidate_classes', DEFAULT_CANDIDATE_CLASSES)
+        self.candidate_ids = np.array([self.class_names.index(name) for name in candidate_classes])
+
+        # Per-stage statistics
+        self.frames = 0
+        self.stage1_hits = 0
+        self.stage2_confirmed = 0
+        self.stage2_overrides = 0
+        self.screener_time = 0.0
+        self.stage2_time = 0.0
+        self.full_frame_time = None
+
+        logger.info(f"Detection cascade enabled (screener imgsz={self.screener_imgsz}, "
+                    f"candidates={', '.join(candidate_classes)})")
+
+    def __call__(self, img, imgsz=None):
+        """Run the cascade on a BGR frame and return a Results object in frame coordinates.
+
+        Args:
+            img: BGR frame
+            imgsz: Optional upper bound for the full model image size (set by the thermal governor)
+        """
+        full_imgsz = min(self.full_imgsz, imgsz) if imgsz else self.full_imgsz
+        if self.full_frame_time is None:
+            self._measure_full_frame(img)
+
+        self.frames += 1
+        height, width = img.shape[:2]
+
+        # Stage 1: screener on a downscaled frame
+        start = time.perf_counter()
+        scale = self.screener_imgsz / max(height, width)
+        size = (round(width * scale), round(height * scale))
+        with frame_pool.borrow((size[1], size[0], 3)) as small:
+            cv2.resize(img, size, dst=small, interpolation=cv2.INTER_AREA)
+            screened = self.screener(small, imgsz=self.screener_imgsz, conf=self.screener_conf, verbose=False)[0]
+        screen_boxes = screened.boxes.data.cpu().numpy().astype(np.float32)
+        screen_boxes[:, :4] /= scale
+        self.screener_time += time.perf_counter() - start
+
+        is_candidate = np.isin(screen_boxes[:, 5].astype(int), self.candidate_ids)
+        candidates = screen_boxes[is_candidate]
+        if len(candidates) == 0:
+            self._maybe_log_stats()
+            return self._make_results(img, screen_boxes)
+        self.stage1_hits += 1
+
+        # Stage 2: full model on full-resolution crops around the candidates
+        start = time.perf_counter()
+        crops_xyxy = expand_boxes(candidates[:, :4], self.crop_padding, self.min_crop_size, width, height)
+        crops = [img[y1:y2, x1:x2] for x1, y1, x2, y2 in crops_xyxy]
+        crop_results = self.full_model(crops, imgsz=full_imgsz, verbose=False)
+
+        stage2_boxes = []
+        for (x1, y1, _, _), result in zip(crops_xyxy, crop_results):
+            boxes = result.boxes.data.cpu().numpy().astype(np.float32)
+            boxes[:, [0, 2]] += x1
+            boxes[:, [1, 3]] += y1
+            stage2_boxes.append(boxes)
+        stage2_boxes = np.concatenate(stage2_boxes) if stage2_boxes else np.empty((0, 6), np.float32)
+        if len(stage2_boxes):
+            # Overlapping crops can see the same insect twice
+            keep = nms(stage2_boxes[:, :4], stage2_boxes[:, 4], self.nms_iou, classes=stage2_boxes[:, 5])
+            stage2_boxes = stage2_boxes[keep]
+        self.stage2_time += time.perf_counter() - start
+
+        # The second stage overrides the first when it rejects or re-classifies the candidate
+        stage2_candidates = stage2_boxes[np.isin(stage2_boxes[:, 5].astype(int), self.candidate_ids)]
+        if len(stage2_candidates) == 0:
+            self.stage2_overrides += 1
+        else:
+            self.stage2_confirmed += 1
+            screen_top = int(candidates[np.argmax(candidates[:, 4]), 5])
+            full_top = int(stage2_candidates[np.argmax(stage2_candidates[:, 4]), 5])
+            if screen_top != full_top:
+                self.stage2_overrides += 1
+
+        self._maybe_log_stats()
+        merged = np.concatenate([screen_boxes[~is_candidate], stage2_boxes])
+        return self._make_results(img, merged)
+
+    def _measure_full_frame(self, img):
+        """Time one full-model pass on a whole frame as the reference for compute saved."""
+        start = time.perf_counter()
+        self.full_model(img, imgsz=self.full_imgsz, verbose=False)
+        self.full_frame_time = time.perf_counter() - start
+        logger.info(f"Cascade reference: full model takes {self.full_frame_time:.2f}s per frame")
+
+    def _make_results(self, img, boxes):
+        """Wrap an (N, 6) box array in an ultralytics Results object."""
+        return Results(img, path=None, names=self.names, boxes=torch.from_numpy(boxes.reshape(-1, 6)))
+
+    def get_stats(self):
+        """Return per-stage hit rates and the compute saved so far."""
+        frames = max(self.frames, 1)
+        cascade_time = self.screener_time + self.stage2_time
+        reference_time = (self.full_frame_time or 0.0) * self.frames
+        return {
+            'frames': self.frames,
+            'stage1_hit_rate': self.stage1_hits / frames,
+            'stage2_confirm_rate': self.stage2_confirmed / max(self.stage1_hits, 1),
+            'stage2_override_rate': self.stage2_overrides / max(self.stage1_hits, 1),
+            'screener_time_s': self.screener_time,
+            'stage2_time_s': self.stage2_time,
+            'compute_saved_s': reference_time - cascade_time,
+            'compute_saved_percent': 100 * (1 - cascade_time / reference_time) if reference_time else 0.0,
+        }
+
+    def _maybe_log_stats(self):
+        """Log cascade statistics every log_every frames (never with 0)."""
+        if not self.log_every or self.frames % self.log_every:
+            return
+        stats = self.get_stats()
+        logger.info("Cascade: %d frames, stage1 hit rate %.1f%%, stage2 confirmed %.1f%%, "
+                    "overrides %.1f%%, compute saved %.1fs (%.0f%%)",
+                    stats['frames'], 100 * stats['stage1_hit_rate'], 100 * stats['stage2_confirm_rate'],
+                    100 * stats['stage2_override_rate'], stats['compute_saved_s'],
+                    stats['compute_saved_percent'])
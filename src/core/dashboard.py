@@ -0,0 +1,347 @@
+"""
+Local web dashboard for the vespCV detector.
+
+A small asyncio HTTP server in its own thread, so a headless Pi can be
+watched from a browser instead of over VNC. Everything is served from
+in-memory caches filled from the event bus once per frame; page views
+never touch the SD card or wait for the detection loop.
+
+    /                   Dashboard page
+    /preview.jpg        Latest annotated preview (encoded once per frame)
+    /stream.mjpg        MJPEG stream of the previews
+    /api/detections     Recent detections as JSON (?limit=N)
+    /api/stats          Uptime, latest telemetry sample, counters, gauges and detections of the last 24 hours as JSON
+    /api/thumbnails     Top Vespa velutina detections as JSON
+    /thumbnails/<id>.jpg
+"""
+
+import os
+import glob
+import json
+import time
+import asyncio
+import threading
+from collections import deque
+from urllib.parse import urlsplit, parse_qs
+
+import cv2
+import numpy as np
+
+from src.core.events import bus, InferenceDone, SystemStats
+from src.core.logger import logger
+from src.core.metrics import metrics
+from src.utils.detection_utils import read_recent_detections
+
+PAGE = b"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>vespCV</title>
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<style>
+body { font-family: sans-serif; background: #FFF8E1; margin: 1em; }
+img.preview { max-width: 100%; }
+#thumbnails img { height: 90px; margin: 4px; }
+table { border-collapse: collapse; } td, th { padding: 2px 8px; text-align: left; }
+.vvel { color: red; font-weight: bold; }
+</style></head>
+<body>
+<h1>Vespa Computer Vision</h1>
+<img class="preview" src="/stream.mjpg" alt="Live preview">
+<h2>Vespa velutina</h2><div id="thumbnails"></div>
+<h2>Recent detections</h2><table id="detections"></table>
+<h2>System</h2><pre id="stats"></pre>
+<script>
+async function refresh() {
+  const detections = await (await fetch('/api/detections?limit=20')).json();
+  document.getElementById('detections').innerHTML = '<tr><th>Time</th><th>Class</th><th>Confidence</th></tr>' +
+    detections.map(d => `<tr class="${d.class}"><td>${d.timestamp}</td><td>${d.class}</td><td>${d.confidence}</td></tr>`).join('');
+  const thumbnails = await (await fetch('/api/thumbnails')).json();
+  document.getElementById('thumbnails').innerHTML =
+    thumbnails.map(t => `<img src="${t.url}" title="${t.timestamp} ${t.confidence}">`).join('');
+  document.getElementById('stats').textContent = JSON.stringify(await (await fetch('/api/stats')).json(), null, 2);
+}
+refresh(); setInterval(refresh, 5000);
+</script></body></html>
+"""
+
+def _json_value(value):
+    """Replace NaN (a missing sensor) with None, which JSON can represent."""
+    return None if isinstance(value, float) and value != value else value
+
+
+STATUS_TEXT = {200: 'OK', 404: 'Not Found', 405: 'Method Not Allowed', 503: 'Service Unavailable'}
+
+
+class Dashboard:
+    def __init__(self, config):
+        """Initialize the dashboard caches.
+
+        Args:
+            config: Application configuration dictionary with a 'dashboard' section
+        """
+        dashboard_config = config.get('dashboard', {})
+        self.host = dashboard_config.get('host', '127.0.0.1')
+        self.port = dashboard_config.get('port', 8080)
+        self.max_thumbnails = dashboard_config.get('thumbnails', 8)
+        self.thumbnail_size = dashboard_config.get('thumbnail_size', 320)
+        self.max_clients = dashboard_config.get('max_clients', 4)
+        self.min_frame_interval = 1.0 / dashboard_config.get('max_stream_fps', 2)
+        self.config = config
+
+        self._lock = threading.Lock()
+        self._preview = None
+        self._preview_seq = 0
+        self._recent = deque(maxlen=dashboard_config.get('recent_detections', 100))
+        self._thumbnails = {}  # timestamp -> (confidence, JPEG bytes)
+        self._system = {}
+        self._started = time.time()
+
+        self._loop = None
+        self._frame_event = None
+        self._stop_event = None
+        self._streams = set()
+        self._thread = None
+        self._subscription = None
+
+    def start(self):
+        """Serve in a background thread with its own event loop."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True, name="dashboard")
+            self._thread.start()
+        if self._subscription is None:
+            self._subscription = bus.subscribe('dashboard', self._on_event, (InferenceDone, SystemStats),
+                                               maxsize=4, drop='oldest')
+
+    def stop(self):
+        """Stop the server and close open streams."""
+        if self._subscription is not None:
+            bus.unsubscribe(self._subscription)
+            self._subscription = None
+        if self._loop is not None and self._stop_event is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _on_event(self, event):
+        """Cache a bus event (dashboard subscriber thread)."""
+        if isinstance(event, SystemStats):
+            record = event.record
+            with self._lock:
+                self._system = {name: _json_value(np.asarray(record[name]).tolist()) for name in record.dtype.names}
+        else:
+            self.publish(event.result)
+
+    def publish(self, result):
+        """Cache the result of a frame; never blocks on IO."""
+        detection = result.get("detection", {})
+        entry = {
+            'timestamp': detection.get("timestamp"),
+            'class': detection.get("class"),
+            'confidence': detection.get("confidence"),
+            'classes': detection.get("classes", []),
+            'alert': bool(detection.get("alert")),
+            'track_id': detection.get("track_id"),
+        }
+        preview = result.get("preview_jpeg")
+        with self._lock:
+            if detection.get("class") != "no_detection":
+                self._recent.append(entry)
+            if preview is not None:
+                self._preview = preview
+                self._preview_seq += 1
+
+        loop = self._loop
+        if loop is None or not loop.is_running():
+            return
+        loop.call_soon_threadsafe(self._notify_frame)
+        if preview is not None and detection.get("class") == "vvel":
+            # Keyed like the archived file name, so burst frames of the same second stay apart
+            key = entry['timestamp'] if detection.get("burst_index") is None \
+                else f"{entry['timestamp']}-b{detection['burst_index']}"
+            loop.call_soon_threadsafe(self._add_thumbnail_soon, key, float(entry['confidence']), preview)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._serve())
+        except Exception as e:
+            logger.error(f"Dashboard stopped: {e}")
+        finally:
+            self._loop.close()
+
+    async def _serve(self):
+        self._frame_event = asyncio.Event()
+        self._stop_event = asyncio.Event()
+        await self._loop.run_in_executor(None, self._seed)
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"Dashboard available at http://{self.host}:{self.port}/")
+        async with server:
+            await self._stop_event.wait()
+            # Wake the streams so they see the stop and finish their requests
+            self._notify_frame()
+            for _ in range(20):
+                if not self._streams:
+                    break
+                await asyncio.sleep(0.05)
+
+    def _seed(self):
+        """Fill the caches from the history, so the page is not empty after a restart."""
+        for timestamp, class_name in read_recent_detections(time.time() - 86400)[-self._recent.maxlen:]:
+            self._recent.append({'timestamp': timestamp, 'class': class_name, 'confidence': None,
+                                 'classes': [class_name], 'alert': False, 'track_id': None})
+
+        # Highest-confidence archived vvel images, decoded at reduced scale
+        candidates = []
+        for path in glob.glob(os.path.join(self.config['images_folder'], 'vvel-*.jpg')):
+            parts = os.path.splitext(os.path.basename(path))[0].split('-')
+            try:
+                candidates.append((float(parts[1]), '-'.join(parts[2:]), path))
+            except (IndexError, ValueError):
+                continue
+        for confidence, timestamp, path in sorted(candidates, reverse=True)[:self.max_thumbnails]:
+            img = cv2.imread(path, cv2.IMREAD_REDUCED_COLOR_8)
+            if img is not None:
+                self._store_thumbnail(timestamp, confidence, img)
+
+    def _notify_frame(self):
+        """Wake the MJPEG streams (event loop thread)."""
+        self._frame_event.set()
+        self._frame_event = asyncio.Event()
+
+    def _add_thumbnail_soon(self, timestamp, confidence, preview):
+        """Make a thumbnail of a vvel preview in the executor (event loop thread)."""
+        with self._lock:
+            if len(self._thumbnails) >= self.max_thumbnails and \
+                    confidence <= min(value[0] for value in self._thumbnails.values()):
+                return
+        self._loop.run_in_executor(None, lambda: self._store_thumbnail(
+            timestamp, confidence, cv2.imdecode(np.frombuffer(preview, np.uint8), cv2.IMREAD_COLOR)))
+
+    def _store_thumbnail(self, timestamp, confidence, img):
+        """Resize, encode and keep a thumbnail; only the top max_thumbnails by confidence are kept."""
+        height, width = img.shape[:2]
+        scale = min(self.thumbnail_size / max(height, width), 1.0)
+        img = cv2.resize(img, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, 80])
+        if not ok:
+            return
+        with self._lock:
+            self._thumbnails[timestamp] = (confidence, encoded.tobytes())
+            while len(self._thumbnails) > self.max_thumbnails:
+                del self._thumbnails[min(self._thumbnails, key=lambda key: self._thumbnails[key][0])]
+
+    async def _handle(self, reader, writer):
+        """Serve one HTTP request."""
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout=10)
+            method, target = request.split(b' ', 2)[:2]
+            url = urlsplit(target.decode('ascii', errors='replace'))
+            metrics.inc('dashboard_requests_total', labels={'path': url.path if url.path in self._routes() else 'other'})
+            if method != b'GET':
+                await self._respond(writer, 405, 'text/plain', b'GET only')
+            elif url.path == '/stream.mjpg':
+                await self._stream(writer)
+            elif url.path.startswith('/thumbnails/'):
+                with self._lock:
+                    thumbnail = self._thumbnails.get(url.path[len('/thumbnails/'):-len('.jpg')])
+                if thumbnail is None:
+                    await self._respond(writer, 404, 'text/plain', b'Not found')
+                else:
+                    await self._respond(writer, 200, 'image/jpeg', thumbnail[1])
+            elif url.path in self._routes():
+                await self._routes()[url.path](writer, parse_qs(url.query))
+            else:
+                await self._respond(writer, 404, 'text/plain', b'Not found')
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def _routes(self):
+        return {
+            '/': self._page,
+            '/preview.jpg': self._preview_image,
+            '/api/detections': self._detections,
+            '/api/stats': self._stats,
+            '/api/thumbnails': self._thumbnail_list,
+        }
+
+    async def _respond(self, writer, status, content_type, body):
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nCache-Control: no-cache\r\nConnection: close\r\n\r\n".encode()
+            + body)
+        await writer.drain()
+
+    async def _respond_json(self, writer, data):
+        await self._respond(writer, 200, 'application/json', json.dumps(data).encode())
+
+    async def _page(self, writer, query):
+        await self._respond(writer, 200, 'text/html; charset=utf-8', PAGE)
+
+    async def _preview_image(self, writer, query):
+        with self._lock:
+            preview = self._preview
+        if preview is None:
+            await self._respond(writer, 503, 'text/plain', b'No frame yet')
+        else:
+            await self._respond(writer, 200, 'image/jpeg', preview)
+
+    async def _detections(self, writer, query):
+        limit = int(query.get('limit', ['20'])[0])
+        with self._lock:
+            recent = list(self._recent)[-limit:][::-1]
+        await self._respond_json(writer, recent)
+
+    async def _stats(self, writer, query):
+        snapshot = metrics.snapshot()
+        with self._lock:
+            frames, system = self._preview_seq, self._system
+        stats = {
+            'uptime_s': round(time.time() - self._started),
+            'frames_since_start': frames,
+            'system': system,
+            'counters': snapshot['counters'],
+            'gauges': snapshot['gauges'],
+        }
+        if self.config.get('timeseries', {}).get('enabled', False):
+            from src.core.timeseries import open_store
+            store = open_store(self.config)
+            _, counts = store.counts('hour', time.time() - 86400)
+            stats['detections_24h'] = dict(zip(store.class_names, counts.sum(axis=0).tolist()))
+        await self._respond_json(writer, stats)
+
+    async def _thumbnail_list(self, writer, query):
+        with self._lock:
+            thumbnails = sorted(((value[0], key) for key, value in self._thumbnails.items()), reverse=True)
+        await self._respond_json(writer, [
+            {'timestamp': key, 'confidence': f"{confidence:.2f}", 'url': f"/thumbnails/{key}.jpg"}
+            for confidence, key in thumbnails
+        ])
+
+    async def _stream(self, writer):
+        """Send every new preview as a part of a multipart MJPEG response, at most max_stream_fps."""
+        if len(self._streams) >= self.max_clients:
+            await self._respond(writer, 503, 'text/plain', b'Too many streams')
+            return
+        self._streams.add(writer)
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: multipart/x-mixed-replace; boundary=frame\r\n"
+                         b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+            sent = None
+            while not self._stop_event.is_set():
+                event = self._frame_event
+                with self._lock:
+                    preview, seq = self._preview, self._preview_seq
+                if preview is not None and seq != sent:
+                    writer.write(b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n" % len(preview)
+                                 + preview + b"\r\n")
+                    await writer.drain()
+                    sent = seq
+                    await asyncio.sleep(self.min_frame_interval)
+                    continue
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=30)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._streams.discard(writer)
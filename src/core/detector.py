@@ -8,47 +8,199 @@ import time
 import threading
 
 import cv2
+import numpy as np
+import torch
 from ultralytics import YOLO
 
-from src.utils.detection_utils import capture_image, save_annotated_image, save_original_image, save_archived_image
-from src.core.logger import logger
+from src.utils.detection_utils import capture_image, capture_burst, render_annotated_preview, save_annotated_image, save_original_image, save_archived_image, log_detection_data
+from src.core.events import bus, FrameCaptured, InferenceDone, DetectionConfirmed
+from src.core.logger import logger, get_cpu_temperature
+from src.core.metrics import metrics
+from src.core.postprocess import PostProcessor, draw_detections
+from src.core.resources import get_resource_budget, pin_current_thread
+from src.utils.frame_pool import frame_pool
 from src.utils.gpio_controller import GPIOController
 
+# Value written to the last pixel of a pooled frame buffer to detect a failed decode
+DECODE_MARK = (1, 254, 3)
+
 class DetectionController:
-    def __init__(self, result_callback, led_controller=None):
+    def __init__(self, result_callback=None, led_controller=None, config=None):
         """Initialize the detection controller.
         
+        Results are published on the event bus; see src/core/events.py.
+        
         Args:
-            result_callback: Function to call with detection results
+            result_callback: Optional function to call with each detection result, in its own subscriber thread
             led_controller: Optional LEDController instance. If None, creates a new one.
+            config: Optional configuration dictionary. If None, loads config/config.yaml.
         """
         self._thread = None
         self._stop_event = threading.Event()
         self._pause_event = threading.Event()
-        self.result_callback = result_callback
 
         # Load config and model
-        self.config = self._load_config()
+        self.config = config if config is not None else self._load_config()
         self.model = self._create_model()
+        self.cascade = self._create_cascade()
+        self.postprocessor = PostProcessor(self.config)
+        self.tracker = self._create_tracker()
+        self.governor = self._create_governor()
+        self.retention = self._create_retention()
+        self.dedup = self._create_dedup()
+        self.sampler = self._create_sampler()
+        self.timeseries = self._create_timeseries()
+        self.dashboard = self._create_dashboard()
+        self.archive = self._create_archive()
+        self.resource_budget = get_resource_budget(self.config)
+        self._applied_threads = None
+        self._default_threads = torch.get_num_threads()
+
+        # Frame shape last decoded per capture path, for decoding into pooled buffers
+        self._frame_shapes = {}
+
+        # Burst capture state
+        self._burst_until = 0
+        self._burst_cooldown_until = 0
         
         # Initialize LED controller
         self.led_controller = led_controller if led_controller is not None else GPIOController()
 
+        # GPIO and the result callback run in subscriber threads, so they never delay the detection loop
+        self._subscriptions = [
+            bus.subscribe('gpio', self._on_detection_confirmed, (DetectionConfirmed,), maxsize=1, drop='newest'),
+        ]
+        if result_callback is not None:
+            self._subscriptions.append(bus.subscribe(
+                'results', lambda event: result_callback(event.result), (InferenceDone,), maxsize=2, drop='oldest'))
+
     def _load_config(self):
         """Load the configuration."""
         from src.core.config_loader import load_config
         return load_config()
 
     def _create_model(self):
-        """Create and return the YOLO model."""
+        """Create and return the YOLO model.
+
+        model_path may point to the FP32 .pt weights or to an INT8 artifact
+        exported by src/utils/quantize.py (OpenVINO directory or .tflite file).
+        """
         try:
-            model = YOLO(self.config['model_path'])
+            model = YOLO(self.config['model_path'], task='detect')
             logger.info("YOLO model loaded successfully")
             return model
         except Exception as e:
             logger.error("Failed to load YOLO model: %s", e)
             raise
 
+    def _create_cascade(self):
+        """Create the two-stage cascade if it is enabled in the config."""
+        if not self.config.get('cascade', {}).get('enabled', False):
+            return None
+        from src.core.cascade import CascadeDetector
+        return CascadeDetector(self.model, self.config)
+
+    def _create_tracker(self):
+        """Create the multi-frame confirmation tracker if it is enabled in the config."""
+        tracker_config = self.config.get('tracker', {})
+        if not tracker_config.get('enabled', False):
+            return None
+        from src.core.tracker import HornetTracker
+        return HornetTracker(
+            confirm_hits=tracker_config.get('confirm_hits', 2),
+            window=tracker_config.get('window', 3),
+            iou_threshold=tracker_config.get('iou_threshold', 0.3),
+        )
+
+    def _create_governor(self):
+        """Create and start the thermal governor if it is enabled in the config."""
+        if not self.config.get('governor', {}).get('enabled', False):
+            return None
+        from src.core.governor import ThermalGovernor
+        governor = ThermalGovernor(self.config)
+        governor.start()
+        return governor
+
+    def _create_retention(self):
+        """Create and start the disk retention manager if it is enabled in the config."""
+        if not self.config.get('retention', {}).get('enabled', False):
+            return None
+        from src.core.retention import RetentionManager
+        retention = RetentionManager(self.config)
+        retention.start()
+        return retention
+
+    def _create_archive(self):
+        """Create and start the archive tier that packs old frames into shards if it is enabled."""
+        if not self.config.get('archive', {}).get('enabled', False):
+            return None
+        from src.core.archive import FrameArchive
+        archive = FrameArchive(self.config, retention=self.retention)
+        archive.start()
+        return archive
+
+    def _create_dedup(self):
+        """Create the near-duplicate filter for saved training frames if it is enabled in the config."""
+        if not self.config.get('dedup', {}).get('enabled', False):
+            return None
+        from src.core.dedup import DuplicateFilter
+        return DuplicateFilter(self.config)
+
+    def _create_sampler(self):
+        """Create the active-learning sampler that picks the training frames if it is enabled in the config."""
+        if not self.config.get('sampling', {}).get('enabled', False):
+            return None
+        from src.core.sampler import ActiveLearningSampler
+        return ActiveLearningSampler(self.config)
+
+    def _create_timeseries(self):
+        """Open the detection time series store if it is enabled in the config."""
+        if not self.config.get('timeseries', {}).get('enabled', False):
+            return None
+        from src.core.timeseries import open_store
+        return open_store(self.config)
+
+    def _create_dashboard(self):
+        """Create and start the web dashboard if it is enabled in the config."""
+        if not self.config.get('dashboard', {}).get('enabled', False):
+            return None
+        from src.core.dashboard import Dashboard
+        dashboard = Dashboard(self.config)
+        dashboard.start()
+        return dashboard
+
+    def _capture_interval(self):
+        """Return the idle capture interval, stretched by the governor when throttling."""
+        if self.governor is None:
+            return self.config['capture_interval']
+        return self.config['capture_interval'] * self.governor.current()['interval_scale']
+
+    def _inference_kwargs(self):
+        """Apply the governor's thread count and return extra model arguments for this cycle."""
+        if self.governor is None:
+            return {}
+        level = self.governor.current()
+        # The governor can lower the thread count but never exceed the resource budget;
+        # a level without threads (level 0) restores the budget
+        budget_threads = self.resource_budget['torch_threads'] or self._default_threads
+        threads = min(level.get('threads', budget_threads), budget_threads)
+        if threads != self._applied_threads:
+            torch.set_num_threads(threads)
+            self._applied_threads = threads
+        return {'imgsz': level['imgsz']} if 'imgsz' in level else {}
+
+    def _run_inference(self, img):
+        """Run the model, or the cascade when enabled, and return the Results for the frame."""
+        kwargs = self._inference_kwargs()
+        start = time.perf_counter()
+        if self.cascade is not None:
+            results = self.cascade(img, **kwargs)
+        else:
+            results = self.model(img, **kwargs)[0]
+        if self.governor is not None:
+            self.governor.record_latency(time.perf_counter() - start)
+        return results
+
     def start(self):
         """Start the detection process."""
         if self._thread is None or not self._thread.is_alive():
@@ -73,6 +225,8 @@ class DetectionController:
 
     def _detection_loop(self):
         """Main detection loop."""
+        # Keep inference (and the torch/OpenMP workers it starts) off the GUI/IO cores
+        pin_current_thread(self.resource_budget['inference_cpus'])
         last_detection_time = 0
         
         while not self._stop_event.is_set():
@@ -86,15 +240,22 @@ class DetectionController:
                 time_since_last = current_time - last_detection_time
                 
                 # Subtract x seconds from the configured capture interval
-                adjusted_capture_interval = self.config['capture_interval'] - 3 # seconds to compensate for the time it takes to process the image    
+                adjusted_capture_interval = self._capture_interval() - 3 # seconds to compensate for the time it takes to process the image    
 
-                
+                if self._in_burst(current_time):
+                    # Capture and process a batch of reduced resolution frames
+                    for result in self._process_burst():
+                        self._update_burst_state(result["detection"])
+                    last_detection_time = current_time
+
+                    # Check if LED needs to be turned off
+                    self.led_controller.check_and_turn_off()
                 # Only proceed if enough time has passed since last detection
-                if time_since_last >= adjusted_capture_interval:
+                elif time_since_last >= adjusted_capture_interval:
                     # Capture and process image
                     result = self._process_single_frame()
                     if result:
-                        self.result_callback(result)
+                        self._update_burst_state(result["detection"])
                         last_detection_time = current_time
                     
                     # Check if LED needs to be turned off
@@ -105,6 +266,7 @@ class DetectionController:
                 
             except Exception as e:
                 logger.error("Error in detection loop: %s", e)
+                metrics.inc('errors_total', labels={'stage': 'loop'})
                 # Sleep briefly on error to prevent tight error loops
                 time.sleep(1)
 
@@ -115,95 +277,305 @@ class DetectionController:
     def _process_single_frame(self):
         """Process a single frame and return detection results."""
         try:
-            # Capture image
-            image_path = capture_image()
-            if not image_path or not os.path.exists(image_path):
-                logger.error("Failed to capture image")
-                return None
-
-            # Load image
-            img = cv2.imread(image_path)
-            if img is None:
-                logger.error("Failed to load captured image")
-                return None
-
-            # Run inference
-            results = self.model(img)[0]
-            
-            # Process detections
-            detections = self._process_detections(results, img)
-            if not detections:
-                return None
-
-            # Handle LED for valid detections
-            if detections.get("class") == "vvel":
-                self.led_controller.handle_detection()
+            with metrics.span('frame'):
+                # Capture image
+                with metrics.span('capture'):
+                    image_path = capture_image()
+                if not image_path or not os.path.exists(image_path):
+                    logger.error("Failed to capture image")
+                    metrics.inc('errors_total', labels={'stage': 'capture'})
+                    return None
 
-            # Save original image with detection metadata and YOLO results
-            original_path = save_original_image(self.config, detections, results)
+                # Load image
+                with metrics.span('decode'):
+                    img = self._decode_image(image_path)
+                if img is None:
+                    logger.error("Failed to load captured image")
+                    metrics.inc('errors_total', labels={'stage': 'decode'})
+                    return None
+                bus.publish(FrameCaptured(time.strftime("%Y%m%d-%H%M%S"), image_path))
 
-            # Save annotated image for GUI
-            annotated_path = save_annotated_image(img, results, self.config)
-            
-            # Archive image if detection is valid
-            archive_path = save_archived_image(img, detections, self.config)
+                try:
+                    # Run inference
+                    with metrics.span('inference'):
+                        results = self._run_inference(img)
 
-            return {
-                "annotated_path": annotated_path,
-                "original_path": original_path,
-                "detection": detections
-            }
+                    return self._handle_frame(img, image_path, results)
+                finally:
+                    frame_pool.release(img)
 
         except Exception as e:
             logger.error("Error processing frame: %s", e)
+            metrics.inc('errors_total', labels={'stage': 'frame'})
             return None
 
-    def _process_detections(self, results, img):
-        """Process detection results and return detection info."""
-        detected_classes = {}
-        class_3_detected = False
-        class_3_conf = 0.0
-        max_conf = 0.0
-        max_conf_class = None
-
-        for result in results.boxes.data.tolist():
-            x1, y1, x2, y2, conf, cls = result[:6]
-            if conf > self.config['conf_threshold']:
-                class_id = int(cls)
-                class_name = self.config['class_names'][class_id]
-                detected_classes[class_id] = max(detected_classes.get(class_id, 0), conf)  # store max conf per class
-
-                if class_id == 3 and conf > class_3_conf:
-                    class_3_detected = True
-                    class_3_conf = conf
-
-                if conf > max_conf:
-                    max_conf = conf
-                    max_conf_class = class_id
-
-                # Only draw bounding box and label if confidence is 0.6 or higher
-                if conf >= 0.6:
-                    # Draw bounding box
-                    cv2.rectangle(img, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 10)
-                    
-                    # Add label
-                    label = f"{class_name} {conf:.2f}"
-                    cv2.putText(img, label, (int(x1), int(y1) - 10),
-                                cv2.FONT_HERSHEY_SIMPLEX, 15.0, (0, 255, 0), 15)
-
-        if class_3_detected:
-            final_class = "vvel"
-            confidence = f"{class_3_conf:.2f}"
-        elif max_conf_class is not None:
-            final_class = self.config['class_names'][max_conf_class]
-            confidence = f"{max_conf:.2f}"
+    def _decode_image(self, image_path):
+        """Load a captured image as a BGR array, or None if it cannot be read.
+
+        The camera writes every frame to the same path at the same resolution, so
+        from the second frame on the image is decoded into a frame_pool buffer of
+        the shape last seen for the path. Give it back with frame_pool.release()
+        when the frame is done.
+        """
+        shape = self._frame_shapes.get(image_path)
+        if shape is not None and cv2.haveImageReader(image_path):
+            buffer = frame_pool.acquire(shape)
+            # imread returns dst untouched when the decode fails, so mark the pixel written last;
+            # a frame that really ends in this value only costs the fallback decode below
+            buffer[-1, -1] = DECODE_MARK
+            try:
+                img = cv2.imread(image_path, buffer)
+            except cv2.error:
+                img = None  # The resolution changed
+            if img is not None and (img[-1, -1] != DECODE_MARK).any():
+                return img
+            # Decode into a new array, which is None if the file really cannot be decoded
+            frame_pool.release(buffer)
+        img = cv2.imread(image_path)
+        if img is not None:
+            self._frame_shapes[image_path] = img.shape
+        return img
+
+    def _process_burst(self):
+        """Capture a burst of frames, batch them through the model and return their results."""
+        burst_config = self.config.get('burst', {})
+        try:
+            with metrics.span('burst_capture'):
+                image_paths = capture_burst(
+                    count=burst_config.get('frames', 4),
+                    interval=burst_config.get('interval', 1),
+                    width=burst_config.get('width', 2328),
+                    height=burst_config.get('height', 1746),
+                )
+            frames = [(path, self._decode_image(path)) for path in image_paths]
+            frames = [(path, img) for path, img in frames if img is not None]
+            if not frames:
+                logger.error("Failed to load burst images")
+                return []
+
+            # Batch all burst frames through the model at once
+            kwargs = self._inference_kwargs()
+            with metrics.span('burst_inference'):
+                if self.cascade is not None:
+                    batch_results = [self.cascade(img, **kwargs) for _, img in frames]
+                else:
+                    batch_results = self.model([img for _, img in frames], verbose=False, **kwargs)
+
+            results = []
+            try:
+                for burst_index, ((image_path, img), frame_results) in enumerate(zip(frames, batch_results)):
+                    # Use the capture time so burst frames get distinct timestamps
+                    timestamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(os.path.getmtime(image_path)))
+                    bus.publish(FrameCaptured(timestamp, image_path, burst=True))
+                    result = self._handle_frame(img, image_path, frame_results, timestamp, burst_index)
+                    if result:
+                        results.append(result)
+            finally:
+                for _, img in frames:
+                    frame_pool.release(img)
+            return results
+
+        except Exception as e:
+            logger.error("Error processing burst: %s", e)
+            metrics.inc('errors_total', labels={'stage': 'burst'})
+            self._end_burst(time.time())
+            return []
+
+    def _handle_frame(self, img, image_path, results, timestamp=None, burst_index=None):
+        """Post-process, alert on and save one frame and return its detection result."""
+        metrics.inc('frames_total')
+
+        # Process detections
+        with metrics.span('postprocess'):
+            detections = self._process_detections(results)
+        if not detections:
+            return None
+        if timestamp:
+            detections["timestamp"] = timestamp
+        # Burst frames captured within the same second need distinct file names
+        detections["burst_index"] = burst_index
+        if detections.get("class") != "no_detection":
+            metrics.inc('detections_total', labels={'class': detections["class"]})
+            if self.timeseries is not None:
+                self.timeseries.add_detection(
+                    detections["class"], time.mktime(time.strptime(detections["timestamp"], "%Y%m%d-%H%M%S")))
+
+        # Decide whether this frame raises an alert
+        with metrics.span('track'):
+            self._track_detections(results, detections)
+
+        if detections.get("alert"):
+            metrics.inc('alerts_total')
+
+        # Let the active-learning sampler pick the informative training frames
+        reason = None
+        if self.sampler is not None:
+            with metrics.span('sample'):
+                reason = self.sampler.select(results.boxes.data, detections)
+        training_frame = detections.get("should_archive") if self.sampler is None else reason is not None
+
+        # Skip training frames that nearly duplicate a recently saved frame with the same classes
+        duplicate_of = None
+        if self.dedup is not None and training_frame:
+            with metrics.span('dedup'):
+                frame_hash, match = self.dedup.check(img, detections["classes"])
+            if match is not None:
+                duplicate_of = self.dedup.path_of(match)
+
+        # Save original image with detection metadata and YOLO results
+        original_path = None
+        with metrics.span('save_original'):
+            if duplicate_of is not None:
+                # Still log the detection, pointing at the frame it duplicates
+                log_detection_data(detections, duplicate_of)
+            elif self.sampler is None or reason is not None:
+                original_path = save_original_image(self.config, detections, results, image_path,
+                                                    keep_name=reason is not None)
+                if self.dedup is not None and training_frame and original_path:
+                    self.dedup.add(frame_hash, detections["classes"], original_path)
+                if reason is not None and original_path:
+                    self.sampler.record(reason, detections, original_path)
+
+        # Encode the annotated preview once for the GUI file and the dashboard
+        with metrics.span('preview'):
+            preview_jpeg = render_annotated_preview(img, detections["detections"], self.config)
+
+        # Save annotated preview for GUI
+        with metrics.span('save_annotated'):
+            annotated_path = save_annotated_image(img, detections["detections"], self.config, preview_jpeg)
+
+        # Full-resolution annotation only when archived images should carry the boxes
+        annotation_config = self.config.get('annotation', {})
+        if detections.get("should_archive") and annotation_config.get('archive_annotated', False):
+            with metrics.span('draw'):
+                draw_detections(img, detections["detections"], self.config['class_names'],
+                                annotation_config.get('min_confidence', 0.0))
+
+        # Archive image if detection is valid
+        with metrics.span('save_archived'):
+            archive_path = save_archived_image(img, detections, self.config)
+        if self.sampler is not None and reason is None:
+            # Frames the sampler did not keep are logged with the archived image instead
+            log_detection_data(detections, archive_path)
+
+        # Index the saved frames so the retention manager can delete old ones without scanning
+        if self.retention is not None:
+            for path in (original_path, archive_path):
+                self.retention.register(path, detections["class"], detections["confidence"], time.time())
+
+        result = {
+            "annotated_path": annotated_path,
+            "original_path": original_path,
+            "preview_jpeg": preview_jpeg,
+            "detection": detections
+        }
+        # GPIO, email, the GUI and the dashboard pick the results up from the bus
+        bus.publish(InferenceDone(detections["timestamp"], result))
+        if detections.get("alert"):
+            bus.publish(DetectionConfirmed(detections["timestamp"], detections["class"], detections["confidence"],
+                                           detections.get("track_id"), archive_path or image_path, annotated_path))
+        return result
+
+    def _on_detection_confirmed(self, event):
+        """Turn on the GPIO for a confirmed detection (gpio subscriber thread)."""
+        with metrics.span('gpio'):
+            self.led_controller.handle_detection()
+
+    def _in_burst(self, current_time):
+        """Return True while burst mode is active and the CPU/temperature budget allows it."""
+        if not self._burst_until:
+            return False
+        if current_time >= self._burst_until:
+            self._end_burst(current_time)
+            return False
+        if not self._burst_budget_ok():
+            logger.warning("Burst mode stopped: CPU temperature/load budget exceeded")
+            self._end_burst(current_time)
+            return False
+        return True
+
+    def _update_burst_state(self, detections):
+        """Enter or extend burst mode when a hornet class is detected."""
+        burst_config = self.config.get('burst', {})
+        if not burst_config.get('enabled', False):
+            return
+
+        current_time = time.time()
+        trigger_classes = burst_config.get('trigger_classes', ['vcra', 'vespsp', 'vvel'])
+        if not any(name in trigger_classes for name in detections.get("classes", [])):
+            return
+
+        if current_time < self._burst_cooldown_until or not self._burst_budget_ok():
+            return
+        if current_time >= self._burst_until:
+            logger.info("Hornet detected, switching to burst capture")
+            metrics.set_gauge('burst_active', 1)
+        self._burst_until = current_time + burst_config.get('window', 60)
+
+    def _end_burst(self, current_time):
+        """Return to the idle cadence and start the burst cooldown."""
+        self._burst_until = 0
+        metrics.set_gauge('burst_active', 0)
+        self._burst_cooldown_until = current_time + self.config.get('burst', {}).get('cooldown', 60)
+        logger.info("Burst capture ended, back to idle capture interval")
+
+    def _burst_budget_ok(self):
+        """Check the CPU temperature and load against the burst budget."""
+        if self.governor is not None and self.governor.is_throttling():
+            return False
+        burst_config = self.config.get('burst', {})
+        temperature = get_cpu_temperature()
+        if temperature is not None and temperature >= burst_config.get('max_temperature', 75):
+            return False
+        load_per_core = os.getloadavg()[0] / (os.cpu_count() or 1)
+        return load_per_core < burst_config.get('max_load', 0.9)
+
+    def _track_detections(self, results, detections):
+        """Add track_id and alert fields to the detection info.
+
+        Without a tracker every vvel frame alerts. With the tracker, vvel boxes are
+        associated across frames and only a newly confirmed track alerts.
+        """
+        if self.tracker is None:
+            detections["track_id"] = None
+            detections["alert"] = detections.get("class") == "vvel"
+            return
+
+        tracked_ids = [self.config['class_names'].index(name)
+                       for name in self.config.get('tracker', {}).get('classes', ['vvel'])]
+        tracked = detections["detections"][np.isin(detections["detections"]['class_id'], tracked_ids)]
+
+        # Track in normalized coordinates so burst frames at reduced resolution match idle frames
+        height, width = results.orig_shape
+        boxes = tracked['box'] / np.array([width, height, width, height], dtype=np.float32)
+        track_ids, alerts = self.tracker.update(boxes, time.time())
+
+        if len(track_ids):
+            # Detections are sorted by confidence, so the first track is the most confident box
+            detections["track_id"] = int(track_ids[0])
         else:
-            final_class = "no_detection"
-            confidence = "0.00"
+            detections["track_id"] = None
+        detections["alert"] = bool(alerts)
+
+    def _process_detections(self, results):
+        """Post-process the results of a frame and return detection info.
+
+        The 'detections' field holds the structured array of the detections
+        that passed the per-class thresholds; 'class' and 'confidence' describe
+        the frame for file names, logs and the GUI.
+        """
+        detections = self.postprocessor(results.boxes.data)
+        primary = self.postprocessor.primary(detections)
+        if primary is None:
+            final_class, confidence = "no_detection", 0.0
+        else:
+            final_class, confidence = self.config['class_names'][primary[0]], primary[1]
 
         return {
             "class": final_class,
-            "confidence": confidence,
+            "confidence": f"{confidence:.2f}",
+            "classes": self.postprocessor.class_names_of(detections),
+            "detections": detections,
             "timestamp": time.strftime("%Y%m%d-%H%M%S"),
             "should_archive": final_class != "no_detection"
         }
@@ -214,6 +586,16 @@ class DetectionController:
             logger.info("Starting detector shutdown...")
             # Set stop event to stop the detection loop
             self._stop_event.set()
+            if self.governor is not None:
+                self.governor.stop()
+            if self.retention is not None:
+                self.retention.stop()
+            if self.archive is not None:
+                self.archive.stop()
+            if self.timeseries is not None:
+                self.timeseries.flush()
+            if self.dashboard is not None:
+                self.dashboard.stop()
             
             # Wait for thread to finish with timeout
             if self._thread and self._thread.is_alive():
@@ -223,6 +605,9 @@ class DetectionController:
                 if self._thread.is_alive():
                     logger.warning("Detection thread did not stop gracefully")
             
+            for subscription in self._subscriptions:
+                bus.unsubscribe(subscription)
+            
             # Add a small delay to ensure camera operations complete
             time.sleep(0.5)
             
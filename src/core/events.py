@@ -0,0 +1,147 @@
+"""
+In-process publish/subscribe event bus.
+
+The detection loop publishes typed events and returns immediately; every
+subscriber has its own thread and a bounded queue, so a slow consumer (a
+mail server, the Tk main loop, a browser on a slow link) can never delay
+detection. When a queue is full the subscriber's drop policy decides which
+event is lost:
+
+    'oldest'  Drop the oldest queued event (consumers that only need the latest state: GUI, dashboard)
+    'newest'  Drop the new event (consumers that act on the first events: GPIO, email)
+
+Drops are counted in the events_dropped_total metric per subscriber.
+"""
+
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from src.core.logger import logger
+from src.core.metrics import metrics
+
+
+@dataclass(frozen=True)
+class FrameCaptured:
+    """A frame was captured and decoded."""
+    timestamp: str
+    image_path: str
+    burst: bool = False
+
+
+@dataclass(frozen=True)
+class InferenceDone:
+    """A frame was post-processed and saved; result is the dict the detector returns."""
+    timestamp: str
+    result: dict = field(repr=False)
+
+
+@dataclass(frozen=True)
+class DetectionConfirmed:
+    """A detection raised an alert (every vvel frame, or a newly confirmed track with the tracker)."""
+    timestamp: str
+    class_name: str
+    confidence: str
+    track_id: Optional[int]
+    image_path: Optional[str]
+    annotated_path: Optional[str]
+
+
+@dataclass(frozen=True)
+class SystemStats:
+    """A telemetry sample; record is a telemetry.RECORD_DTYPE record."""
+    time: float
+    record: Any = field(repr=False)
+
+
+class Subscription:
+    def __init__(self, name, handler, event_types, maxsize=8, drop='oldest'):
+        """Create a subscriber with its own queue and thread.
+
+        Args:
+            name: Name used for the thread and the metrics labels
+            handler: Function called with each event, in the subscriber thread
+            event_types: Tuple of event classes to receive
+            maxsize: Maximum number of queued events
+            drop: 'oldest' or 'newest', the event dropped when the queue is full
+        """
+        if drop not in ('oldest', 'newest'):
+            raise ValueError(f"Unknown drop policy: {drop}")
+        self.name = name
+        self.handler = handler
+        self.event_types = tuple(event_types)
+        self.maxsize = maxsize
+        self.drop = drop
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"events-{name}")
+        self._thread.start()
+
+    def offer(self, event):
+        """Queue an event without blocking. Returns False if an event was dropped."""
+        with self._condition:
+            dropped = len(self._queue) >= self.maxsize
+            if dropped:
+                if self.drop == 'newest':
+                    metrics.inc('events_dropped_total', labels={'subscriber': self.name})
+                    return False
+                self._queue.popleft()
+                metrics.inc('events_dropped_total', labels={'subscriber': self.name})
+            self._queue.append(event)
+            self._condition.notify()
+        return not dropped
+
+    def close(self, timeout=2.0):
+        """Stop the thread after the event being handled; queued events are discarded."""
+        with self._condition:
+            self._stopped = True
+            self._queue.clear()
+            self._condition.notify()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                event = self._queue.popleft()
+            try:
+                self.handler(event)
+            except Exception as e:
+                logger.error(f"Error in event subscriber {self.name}: {e}")
+                metrics.inc('errors_total', labels={'stage': f"subscriber_{self.name}"})
+
+
+class EventBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = ()
+
+    def subscribe(self, name, handler, event_types, maxsize=8, drop='oldest'):
+        """Start a subscriber thread for the given event types and return its Subscription."""
+        subscription = Subscription(name, handler, event_types, maxsize, drop)
+        with self._lock:
+            self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove a subscriber and stop its thread."""
+        with self._lock:
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+        subscription.close()
+
+    def publish(self, event):
+        """Hand an event to every subscriber of its type; never blocks on a subscriber."""
+        # The tuple is replaced, never mutated, so it can be iterated without the lock
+        for subscription in self._subscriptions:
+            if isinstance(event, subscription.event_types):
+                subscription.offer(event)
+
+
+# Process-wide bus used by the detector, the GUI, the dashboard and the telemetry sampler
+bus = EventBus()
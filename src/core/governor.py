@@ -0,0 +1,150 @@
+"""
+Thermal- and load-aware governor for the vespCV detection loop.
+
+Samples the CPU temperature and load every few seconds and steps through a
+list of throttle levels. Each level sets the capture interval scale, the
+inference image size and the number of inference threads, so the detector
+stays under the configured temperature ceiling.
+"""
+
+import os
+import time
+import threading
+
+from src.core.logger import logger, get_cpu_temperature
+from src.core.metrics import metrics
+
+# Level 0 is unthrottled and sets no imgsz/threads, so the model's image size and the
+# resource budget apply; every next level trades detection rate and resolution for heat
+DEFAULT_LEVELS = [
+    {'interval_scale': 1.0},
+    {'interval_scale': 1.5, 'imgsz': 512, 'threads': 3},
+    {'interval_scale': 2.0, 'imgsz': 416, 'threads': 2},
+    {'interval_scale': 3.0, 'imgsz': 320, 'threads': 1},
+]
+
+
+class ThermalGovernor:
+    def __init__(self, config):
+        """Initialize the governor.
+
+        Args:
+            config: Application configuration dictionary with a 'governor' section
+        """
+        governor_config = config.get('governor', {})
+        self.sample_interval = governor_config.get('sample_interval', 5)
+        self.temp_ceiling = governor_config.get('temp_ceiling', 75)
+        self.temp_hysteresis = governor_config.get('temp_hysteresis', 5)
+        self.load_ceiling = governor_config.get('load_ceiling', 0.9)
+        self.min_dwell = governor_config.get('min_dwell', 30)
+        self.levels = governor_config.get('levels', DEFAULT_LEVELS)
+
+        self.level = 0
+        self._last_change = 0.0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        # Mean inference latency per level, used to log the effect of each decision
+        self._latency_sum = [0.0] * len(self.levels)
+        self._latency_count = [0] * len(self.levels)
+        self._pending_report = None  # (previous level, its mean latency)
+
+    def start(self):
+        """Start sampling in a background thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="governor")
+            self._thread.start()
+            logger.info(f"Thermal governor started (ceiling {self.temp_ceiling}°C, "
+                        f"sampling every {self.sample_interval}s)")
+
+    def stop(self):
+        """Stop the sampling thread."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.sample_interval + 1)
+
+    def _run(self):
+        """Sample until stopped."""
+        while not self._stop_event.wait(self.sample_interval):
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"Error in thermal governor: {e}")
+
+    def sample(self):
+        """Read temperature and load once and step the throttle level if needed."""
+        temperature = get_cpu_temperature()
+        load_per_core = os.getloadavg()[0] / (os.cpu_count() or 1)
+        if temperature is not None:
+            metrics.set_gauge('cpu_temperature_celsius', temperature)
+        metrics.set_gauge('cpu_load_per_core', round(load_per_core, 3))
+
+        too_hot = temperature is not None and temperature >= self.temp_ceiling
+        cool = temperature is None or temperature < self.temp_ceiling - self.temp_hysteresis
+        if too_hot or load_per_core >= self.load_ceiling:
+            new_level = min(self.level + 1, len(self.levels) - 1)
+        elif cool and load_per_core < self.load_ceiling * 0.8:
+            new_level = max(self.level - 1, 0)
+        else:
+            new_level = self.level
+
+        now = time.monotonic()
+        if new_level == self.level or now - self._last_change < self.min_dwell:
+            return
+        self._set_level(new_level, temperature, load_per_core)
+        self._last_change = now
+
+    def _set_level(self, new_level, temperature, load_per_core):
+        """Switch level and log the decision with the latency at the old level."""
+        with self._lock:
+            old_level = self.level
+            old_latency = self._mean_latency(old_level)
+            self.level = new_level
+            metrics.set_gauge('governor_level', new_level)
+            self._latency_sum[new_level] = 0.0
+            self._latency_count[new_level] = 0
+            self._pending_report = (old_level, old_latency)
+
+        old, new = self.levels[old_level], self.levels[new_level]
+        temperature_text = f"{temperature:.1f}°C" if temperature is not None else "N/A"
+        logger.info(
+            f"Governor {'throttling' if new_level > old_level else 'relaxing'}: level {old_level} -> {new_level} "
+            f"(temp {temperature_text}, load {load_per_core:.2f}/core); "
+            f"interval x{old['interval_scale']} -> x{new['interval_scale']}, "
+            f"imgsz {old.get('imgsz', 'default')} -> {new.get('imgsz', 'default')}, "
+            f"threads {old.get('threads', 'default')} -> {new.get('threads', 'default')}; "
+            f"inference latency at level {old_level}: {old_latency:.2f}s"
+        )
+
+    def _mean_latency(self, level):
+        count = self._latency_count[level]
+        return self._latency_sum[level] / count if count else 0.0
+
+    def record_latency(self, seconds):
+        """Record one inference latency at the current level.
+
+        After a level change, the mean of the first few frames at the new level
+        is logged next to the latency at the previous level.
+        """
+        with self._lock:
+            level = self.level
+            self._latency_sum[level] += seconds
+            self._latency_count[level] += 1
+            if self._pending_report is None or self._latency_count[level] < 3:
+                return
+            old_level, old_latency = self._pending_report
+            self._pending_report = None
+            new_latency = self._mean_latency(level)
+
+        logger.info(f"Governor level {level} inference latency {new_latency:.2f}s "
+                    f"(was {old_latency:.2f}s at level {old_level})")
+
+    def current(self):
+        """Return the settings of the current level."""
+        return self.levels[self.level]
+
+    def is_throttling(self):
+        """Return True when any throttle level is active."""
+        return self.level > 0
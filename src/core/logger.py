@@ -1,32 +1,200 @@
-import logging
 import os
+import gzip
+import json
+import queue
+import re
+import atexit
 import shutil
+import logging
 import threading
 import time
+import logging.handlers
 from datetime import datetime
 
 # Configure logging (initial setup without handlers)
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-def configure_logger(log_file_path):
-    """Configure the logger to write logs to the specified file."""
+_listener = None
+_event_flusher = None
+_event_flusher_stop = threading.Event()
+_event_logs = []
+
+def configure_logger(log_file_path, logging_config=None):
+    """Configure the logger to write logs to the specified file.
+
+    Log calls only put the record on a queue; a single background thread
+    formats it and writes it to the console and to a log file that rotates
+    by size and age into gzip-compressed backups.
+
+    Args:
+        log_file_path: Path of the log file
+        logging_config: Optional 'logging' section of the config
+    """
+    global _listener
+    logging_config = logging_config or {}
+
     # Clear existing handlers to prevent duplicate logs
     if logger.hasHandlers():
         logger.handlers.clear()
+    if _listener is not None:
+        _listener.stop()
 
     # Create handlers
     c_handler = logging.StreamHandler() # Console handler
-    f_handler = logging.FileHandler(log_file_path) # File handler
+    f_handler = CompressingRotatingFileHandler(
+        log_file_path,
+        max_bytes=int(logging_config.get('max_mb', 10) * 1024**2),
+        backup_count=logging_config.get('backups', 5),
+        rotate_seconds=logging_config.get('rotate_hours', 24) * 3600,
+        compress=logging_config.get('compress', True),
+    )
 
     # Create formatters and add it to handlers
     formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
     c_handler.setFormatter(formatter)
-    f_handler.setFormatter(formatter)
+    f_handler.setFormatter(JsonFormatter() if logging_config.get('json', False) else formatter)
+
+    # Only the queue handler runs in the calling thread; the listener thread does the IO
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(log_queue, c_handler, f_handler, respect_handler_level=True)
+    _listener.start()
+
+    start_event_flusher(logging_config.get('event_flush_interval', 5))
+
+def shutdown_logging():
+    """Flush the event logs and write the queued log records. Runs at exit."""
+    global _listener
+    _event_flusher_stop.set()
+    for event_log in list(_event_logs):
+        event_log.close()
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(shutdown_logging)
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotate when the file exceeds max_bytes or is older than rotate_seconds; gzip the backups."""
+
+    def __init__(self, filename, max_bytes, backup_count, rotate_seconds=0, compress=True):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        self.rotate_seconds = rotate_seconds
+        # Count the age from the first record in the file, so restarts do not postpone rotation
+        self._rollover_at = self._file_started() + rotate_seconds
+        if compress:
+            self.namer = lambda name: f"{name}.gz"
+            self.rotator = _gzip_rotator
+
+    def shouldRollover(self, record):
+        if self.rotate_seconds and time.time() >= self._rollover_at:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self._rollover_at = time.time() + self.rotate_seconds
+
+    def _file_started(self):
+        """Return the time of the first record in the log file (its mtime if unknown, now if empty)."""
+        try:
+            with open(self.baseFilename, 'r', encoding='utf-8', errors='replace') as f:
+                first_line = f.readline(256)
+            mtime = os.path.getmtime(self.baseFilename)
+        except OSError:
+            return time.time()
+        # Both the text and the JSON format start with the record time
+        match = re.search(r'\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}', first_line)
+        if match is None:
+            return mtime if first_line else time.time()
+        return time.mktime(time.strptime(match.group().replace('T', ' '), '%Y-%m-%d %H:%M:%S'))
 
-    # Add handlers to the logger
-    logger.addHandler(c_handler)
-    logger.addHandler(f_handler)
+def _gzip_rotator(source, dest):
+    """Compress a rotated log file."""
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'thread': record.threadName,
+            'module': record.module,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+class EventLog:
+    """Append-only CSV event log that buffers lines in memory.
+
+    Lines are written by the event flusher thread every event_flush_interval
+    seconds (or when the buffer is full), with the file kept open, so the
+    caller never waits for the SD card.
+    """
+
+    def __init__(self, path, header, max_buffer=256):
+        self.path = path
+        self.header = header
+        self.max_buffer = max_buffer
+        self._lines = []
+        self._file = None
+        self._lock = threading.Lock()
+        _event_logs.append(self)
+
+    def write(self, line):
+        """Queue one line (without newline) for writing."""
+        with self._lock:
+            self._lines.append(line)
+            full = len(self._lines) >= self.max_buffer
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered lines to the file."""
+        with self._lock:
+            lines, self._lines = self._lines, []
+            if not lines:
+                return
+            try:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                    self._file = open(self.path, 'a')
+                    if self._file.tell() == 0:
+                        self._file.write(f"{self.header}\n")
+                self._file.write(''.join(f"{line}\n" for line in lines))
+                self._file.flush()
+            except Exception as e:
+                logger.error(f"Error writing {self.path}: {e}")
+
+    def close(self):
+        """Flush and close the file."""
+        self.flush()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+def start_event_flusher(interval):
+    """Flush all event logs every interval seconds in a background thread."""
+    global _event_flusher
+    if _event_flusher is not None and _event_flusher.is_alive():
+        return
+
+    def run():
+        while not _event_flusher_stop.wait(interval):
+            for event_log in list(_event_logs):
+                event_log.flush()
+
+    _event_flusher_stop.clear()
+    _event_flusher = threading.Thread(target=run, daemon=True, name="event-log-flusher")
+    _event_flusher.start()
 
 def get_cpu_temperature():
     """Get the CPU temperature in Celsius."""
@@ -51,65 +219,3 @@ def get_disk_usage():
     except Exception as e:
         logger.error("Failed to read disk usage: %s", e)
         return None
-
-def log_system_stats():
-    """Log system statistics (temperature and disk usage) every 5 minutes."""
-    with open('data/logs/system_stats.log', 'a') as stats_file:
-        while True:
-            # Get temperature
-            temperature = get_cpu_temperature()
-            
-            # Get disk usage
-            disk_usage = get_disk_usage()
-            
-            # Prepare log entry
-            timestamp = time.time()
-            readable_time = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')  # Convert to readable format
-            log_entry = f"{readable_time},"  # Use the readable timestamp
-            
-            if temperature is not None:
-                log_entry += f"{temperature:.2f},"
-            else:
-                log_entry += "N/A,"
-                
-            if disk_usage is not None:
-                log_entry += f"{disk_usage['used_gb']:.2f},{disk_usage['free_gb']:.2f},{disk_usage['used_percent']:.1f}"
-            else:
-                log_entry += "N/A,N/A,N/A"
-                
-            # Write to log file
-            stats_file.write(log_entry + "\n")
-            stats_file.flush()  # Ensure immediate write to disk
-            
-            # Log to console for monitoring
-            if temperature is not None:
-                logger.info("CPU Temperature: %.2f °C", temperature)
-            if disk_usage is not None:
-                logger.info("Disk Usage: %.2f GB used, %.2f GB free (%.1f%%)", 
-                          disk_usage['used_gb'], disk_usage['free_gb'], disk_usage['used_percent'])
-            
-            time.sleep(300)  # Sleep for 5 minutes
-
-def start_temperature_logging():
-    """Start the system statistics logging in a separate thread."""
-    # Create header in log file if it doesn't exist
-    if not os.path.exists('data/logs/system_stats.log') or os.path.getsize('data/logs/system_stats.log') == 0:
-        with open('data/logs/system_stats.log', 'w') as stats_file:
-            stats_file.write("timestamp,temperature_c,disk_used_gb,disk_free_gb,disk_used_percent\n")
-    
-    stats_thread = threading.Thread(target=log_system_stats)
-    stats_thread.daemon = True  
-    stats_thread.start()
-
-def main():
-    """Main function to start temperature logging."""
-    configure_logger('data/logs/system.log') 
-    start_temperature_logging()  
-    try:
-        while True:
-            time.sleep(1)  # Keep the main thread alive
-    except KeyboardInterrupt:
-        print("System statistics logging stopped.")
-
-if __name__ == "__main__":
-    main() 
\ No newline at end of file
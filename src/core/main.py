@@ -1,9 +1,18 @@
 import os
+import signal
+import argparse
+import threading
 
 from src.core.config_loader import load_config
 from src.core.detector import DetectionController
-from src.core.logger import configure_logger, start_temperature_logging, logger
-from src.gui.app import vespcvGUI
+from src.core.events import bus, DetectionConfirmed
+from src.core.logger import configure_logger, logger
+from src.core.metrics import metrics, start_metrics_server
+from src.core.resources import apply_resource_budget
+from src.core.telemetry import start_telemetry, stop_telemetry
+from src.utils.gpio_controller import GPIOController
+from src.utils.mail_utils import AlertMailer
+from src.utils.profiler import SamplingProfiler, install_signal_handler
 
 def create_directories(required_dirs):
     """Create necessary directories if they do not exist."""
@@ -27,8 +36,12 @@ def initialize_application():
         create_directories(required_dirs)
         
         # Now that directories exist, configure logging
-        configure_logger(config['log_file_path'])
-        start_temperature_logging()
+        configure_logger(config['log_file_path'], config.get('logging'))
+        
+        # Limit thread pools and pin this thread to the IO cores before other threads start
+        apply_resource_budget(config)
+        start_telemetry(config)
+        start_metrics_server(config)
         
         logger.info("Application initialized successfully")
         return config
@@ -36,15 +49,61 @@ def initialize_application():
         print(f"Failed to initialize application: {e}")  # Use print instead of logger
         raise
 
+def run_headless(config):
+    """Run the detector without the GUI until SIGTERM or Ctrl+C; use the web dashboard to watch it."""
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    
+    led_controller = GPIOController()
+    led_controller.set_enabled(config.get('led', {}).get('enabled', False))
+    detector = DetectionController(led_controller=led_controller, config=config)
+    
+    # Without the GUI the mail alert is armed from the config
+    mailer = AlertMailer(config.get('mail_alert_enabled', False))
+    mail_subscription = bus.subscribe('mail', mailer.handle, (DetectionConfirmed,), maxsize=1, drop='newest')
+    
+    profiler_config = config.get('profiler', {})
+    install_signal_handler(SamplingProfiler(interval=profiler_config.get('interval', 0.01)),
+                           profiler_config.get('duration', 30))
+    
+    detector.start()
+    logger.info("Detection running headless")
+    try:
+        while not stop_event.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info("Starting application shutdown...")
+        detector.shutdown()
+        bus.unsubscribe(mail_subscription)
+        led_controller.cleanup()
+        stop_telemetry()
+        trace_file = config.get('metrics', {}).get('trace_file')
+        if trace_file:
+            metrics.export_chrome_trace(trace_file)
+
 def main():
     """Main entry point for the application."""
+    parser = argparse.ArgumentParser(description="vespCV hornet detector")
+    parser.add_argument('--headless', action='store_true', help="Run without the GUI (see the dashboard section in config.yaml)")
+    args = parser.parse_args()
+    
     try:
         # Initialize core components
         config = initialize_application()
         
-        # Create and run GUI
+        if args.headless:
+            run_headless(config)
+            return
+        
+        # Create and run GUI; imported here so tkinter is not needed headless
+        from src.gui.app import vespcvGUI
         app = vespcvGUI(config)
         
+        # Allow recording a profile with `kill -USR1 <pid>`
+        install_signal_handler(app.profiler, config.get('profiler', {}).get('duration', 30))
+        
         # Set up proper shutdown handling
         def on_closing():
             try:
@@ -60,6 +119,14 @@ def main():
                     logger.info("Shutting down detector...")
                     app.detector.shutdown()
                 
+                # Stop the telemetry sampler and flush its ring file
+                stop_telemetry()
+                
+                # Write the Chrome trace if tracing is configured
+                trace_file = config.get('metrics', {}).get('trace_file')
+                if trace_file:
+                    metrics.export_chrome_trace(trace_file)
+                
                 # Clean up any remaining resources
                 logger.info("Cleaning up resources...")
                 for handler in app._cleanup_handlers:
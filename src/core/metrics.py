@@ -0,0 +1,219 @@
+"""
+Lightweight metrics and tracing for the vespCV detection pipeline.
+
+Provides counters, gauges and per-stage timing spans in a process-wide
+registry. The registry is exposed in Prometheus text format by a small local
+HTTP server and can be exported as a Chrome trace JSON file
+(chrome://tracing or https://ui.perfetto.dev) for offline analysis.
+"""
+
+import os
+import json
+import time
+import bisect
+import threading
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.core.logger import logger
+
+# Upper bounds (seconds) of the stage latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class MetricsRegistry:
+    def __init__(self, prefix='vespcv'):
+        """Initialize an empty registry.
+
+        Args:
+            prefix: Prefix for all exported metric names
+        """
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}  # stage -> [bucket counts..., count, sum]
+        self._trace = None
+        self._start_ns = time.perf_counter_ns()
+
+    def enable_tracing(self, max_events=10000):
+        """Keep the most recent spans as Chrome trace events."""
+        self._trace = deque(maxlen=max_events)
+
+    def inc(self, name, value=1, labels=None):
+        """Increase a counter."""
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, labels=None):
+        """Set a gauge to the given value."""
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def add_gauge(self, name, value, labels=None):
+        """Add to a gauge, e.g. to track a queue depth."""
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + value
+
+    def observe(self, stage, seconds):
+        """Record one stage duration in the latency histogram."""
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = [0] * (len(LATENCY_BUCKETS) + 2)
+            histogram[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            histogram[-2] += 1
+            histogram[-1] += seconds
+
+    @contextmanager
+    def span(self, stage):
+        """Time a block of code as a pipeline stage.
+
+        Example:
+            with metrics.span('inference'):
+                results = model(img)
+        """
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            self.observe(stage, (end - start) / 1e9)
+            if self._trace is not None:
+                self._trace.append((stage, start, end, threading.get_ident()))
+
+    def snapshot(self):
+        """Return the current counters and gauges as {'counters': {...}, 'gauges': {...}}."""
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+        return {
+            'counters': {f"{name}{_format_labels(labels)}": value for (name, labels), value in sorted(counters.items())},
+            'gauges': {f"{name}{_format_labels(labels)}": value for (name, labels), value in sorted(gauges.items())},
+        }
+
+    def render_prometheus(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {stage: list(values) for stage, values in self._histograms.items()}
+
+        lines = []
+        for kind, values in (('counter', counters), ('gauge', gauges)):
+            typed = set()
+            for (name, labels), value in sorted(values.items()):
+                full_name = f"{self.prefix}_{name}"
+                if full_name not in typed:
+                    lines.append(f"# TYPE {full_name} {kind}")
+                    typed.add(full_name)
+                lines.append(f"{full_name}{_format_labels(labels)} {value}")
+
+        if histograms:
+            name = f"{self.prefix}_stage_seconds"
+            lines.append(f"# TYPE {name} histogram")
+            for stage, values in sorted(histograms.items()):
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), values[:-2]):
+                    cumulative += count
+                    labels = _format_labels((('stage', stage), ('le', str(bound))))
+                    lines.append(f"{name}_bucket{labels} {cumulative}")
+                stage_label = _format_labels((('stage', stage),))
+                lines.append(f"{name}_count{stage_label} {values[-2]}")
+                lines.append(f"{name}_sum{stage_label} {values[-1]:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def chrome_trace(self):
+        """Return the recorded spans as a Chrome trace event dictionary."""
+        pid = os.getpid()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        events = [
+            {
+                'name': stage,
+                'ph': 'X',
+                'ts': (start - self._start_ns) / 1000,
+                'dur': (end - start) / 1000,
+                'pid': pid,
+                'tid': tid,
+            }
+            for stage, start, end, tid in list(self._trace or ())
+        ]
+        for tid in {event['tid'] for event in events}:
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                           'args': {'name': thread_names.get(tid, str(tid))}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path):
+        """Write the recorded spans to a Chrome trace JSON file."""
+        if self._trace is None:
+            return None
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        logger.info(f"Chrome trace with {len(self._trace)} spans written to {path}")
+        return path
+
+
+def _format_labels(labels):
+    """Format label pairs as {key="value",...}."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+# Process-wide registry used by the detector and GUI
+metrics = MetricsRegistry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/metrics':
+            body = metrics.render_prometheus().encode()
+            content_type = 'text/plain; version=0.0.4'
+        elif self.path == '/trace':
+            body = json.dumps(metrics.chrome_trace()).encode()
+            content_type = 'application/json'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep scrapes out of the detector log
+        pass
+
+
+def start_metrics_server(config):
+    """Start the local metrics endpoint if it is enabled in the config.
+
+    Args:
+        config: Application configuration dictionary with a 'metrics' section
+
+    Returns:
+        ThreadingHTTPServer or None
+    """
+    metrics_config = config.get('metrics', {})
+    if not metrics_config.get('enabled', False):
+        return None
+    if metrics_config.get('trace_file'):
+        metrics.enable_tracing(metrics_config.get('trace_max_events', 10000))
+
+    host = metrics_config.get('host', '127.0.0.1')
+    port = metrics_config.get('port', 9108)
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.error(f"Failed to start metrics server on {host}:{port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    logger.info(f"Metrics available at http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,125 @@
+"""
+Vectorized post-processing of YOLO detections for the vespCV application.
+
+Turns the raw (N, 6) box tensor of a frame into a compact structured array of
+the detections that pass the per-class confidence thresholds, optionally
+suppresses overlapping boxes across classes, and picks the class that
+represents the frame using a configurable class priority list. Drawing the
+detections is a separate stage.
+"""
+
+import cv2
+import numpy as np
+
+from src.utils.box_utils import nms
+
+# One row per detection, sorted by descending confidence
+DETECTION_DTYPE = np.dtype([
+    ('box', np.float32, 4),     # x1, y1, x2, y2 in pixels of the original frame
+    ('confidence', np.float32),
+    ('class_id', np.int16),
+])
+
+# Annotation sizes at the long side of a full 16 MP frame; other resolutions scale linearly
+REFERENCE_SIZE = 4656
+BOX_THICKNESS = 10
+FONT_SCALE = 15.0
+FONT_THICKNESS = 15
+
+
+class PostProcessor:
+    def __init__(self, config):
+        """Initialize the post-processor.
+
+        Args:
+            config: Application configuration dictionary with an optional 'postprocess' section
+        """
+        postprocess_config = config.get('postprocess', {})
+        self.class_names = config['class_names']
+
+        # Per-class confidence thresholds, falling back to conf_threshold
+        self.thresholds = np.full(len(self.class_names), config['conf_threshold'], dtype=np.float32)
+        for name, threshold in (postprocess_config.get('class_thresholds') or {}).items():
+            self.thresholds[self.class_names.index(name)] = threshold
+
+        self.priority_ids = [self.class_names.index(name)
+                             for name in postprocess_config.get('class_priority', ['vvel'])]
+        self.agnostic_nms = postprocess_config.get('agnostic_nms', False)
+        self.nms_iou = postprocess_config.get('nms_iou', 0.7)
+
+    def __call__(self, data):
+        """Filter the raw boxes of one frame.
+
+        Args:
+            data: (N, 6) array or tensor of x1, y1, x2, y2, confidence, class id
+
+        Returns:
+            np.ndarray: Structured DETECTION_DTYPE array, highest confidence first
+        """
+        if hasattr(data, 'cpu'):
+            data = data.cpu().numpy()
+        data = np.asarray(data, dtype=np.float32)
+        if data.ndim != 2:
+            data = data.reshape(-1, 6)
+        class_ids = data[:, -1].astype(np.int16)
+        confidences = data[:, -2]
+
+        data = data[confidences > self.thresholds[class_ids]]
+        if self.agnostic_nms and len(data) > 1:
+            data = data[nms(data[:, :4], data[:, -2], self.nms_iou)]
+        else:
+            data = data[np.argsort(-data[:, -2], kind='stable')]
+
+        detections = np.empty(len(data), dtype=DETECTION_DTYPE)
+        detections['box'] = data[:, :4]
+        detections['confidence'] = data[:, -2]
+        detections['class_id'] = data[:, -1]
+        return detections
+
+    def primary(self, detections):
+        """Return the (class id, confidence) that represents the frame, or None.
+
+        The first class of the priority list that was detected wins; otherwise
+        the most confident detection.
+        """
+        if len(detections) == 0:
+            return None
+        for class_id in self.priority_ids:
+            matches = detections['confidence'][detections['class_id'] == class_id]
+            if len(matches):
+                return class_id, float(matches.max())
+        return int(detections['class_id'][0]), float(detections['confidence'][0])
+
+    def class_names_of(self, detections):
+        """Return the names of the detected classes, in class id order."""
+        return [self.class_names[class_id] for class_id in np.unique(detections['class_id'])]
+
+
+def draw_detections(img, detections, class_names, min_confidence=0.0, box_scale=1.0, color=(0, 255, 0)):
+    """Draw boxes and labels on an image in place.
+
+    Line width and label size scale with the image, so a downscaled preview
+    looks like the full-resolution frame.
+
+    Args:
+        img: BGR image to draw on
+        detections: Structured DETECTION_DTYPE array
+        class_names: List of class names
+        min_confidence: Detections below this confidence are not drawn
+        box_scale: Factor from frame coordinates to img coordinates
+        color: BGR color of boxes and labels
+    """
+    scale = max(img.shape[:2]) / REFERENCE_SIZE
+    thickness = max(1, round(BOX_THICKNESS * scale))
+    font_scale = FONT_SCALE * scale
+    font_thickness = max(1, round(FONT_THICKNESS * scale))
+    margin = max(2, round(10 * scale))
+
+    for box, confidence, class_id in detections[detections['confidence'] >= min_confidence]:
+        x1, y1, x2, y2 = (int(value * box_scale) for value in box)
+        cv2.rectangle(img, (x1, y1), (x2, y2), color, thickness)
+        # Put the label inside the box when there is no room above it
+        text_y = y1 - margin if y1 - margin > margin else y1 + margin
+        cv2.putText(img, f"{class_names[class_id]} {confidence:.2f}", (x1, text_y),
+                    cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, font_thickness)
+    return img
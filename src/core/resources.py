@@ -0,0 +1,76 @@
+"""
+CPU thread budget and affinity for the vespCV application.
+
+Torch, OpenCV and ultralytics each start their own thread pools across all
+cores, which oversubscribes the Raspberry Pi and competes with the Tk main
+loop and the stats thread. The 'resources' section of config.yaml caps the
+pool sizes and can pin the inference thread and the GUI/IO threads to
+separate cores.
+"""
+
+import os
+
+import cv2
+import torch
+
+from src.core.logger import logger
+
+
+def get_resource_budget(config):
+    """Return the resource budget from the config with defaults filled in."""
+    resources_config = config.get('resources') or {}
+    return {
+        'torch_threads': resources_config.get('torch_threads'),
+        'torch_interop_threads': resources_config.get('torch_interop_threads'),
+        'opencv_threads': resources_config.get('opencv_threads'),
+        'inference_cpus': resources_config.get('inference_cpus'),
+        'io_cpus': resources_config.get('io_cpus'),
+    }
+
+
+def apply_resource_budget(config):
+    """Apply the process-wide thread pool sizes and pin the calling thread to the IO cores.
+
+    Call once from the main thread at startup, before the model runs and
+    before other threads are started, so they inherit the IO affinity.
+    Settings left at null keep the library defaults.
+
+    Returns:
+        dict: The applied budget
+    """
+    budget = get_resource_budget(config)
+    if budget['torch_threads']:
+        torch.set_num_threads(budget['torch_threads'])
+    if budget['torch_interop_threads']:
+        try:
+            torch.set_num_interop_threads(budget['torch_interop_threads'])
+        except RuntimeError as e:
+            # Only possible before the first parallel torch operation
+            logger.warning(f"Could not set torch inter-op threads: {e}")
+    if budget['opencv_threads'] is not None:
+        cv2.setNumThreads(budget['opencv_threads'])
+    pin_current_thread(budget['io_cpus'])
+
+    logger.info(
+        f"Resource budget: torch {torch.get_num_threads()} intra-op / {torch.get_num_interop_threads()} "
+        f"inter-op threads, OpenCV {cv2.getNumThreads()} threads, "
+        f"inference cores {budget['inference_cpus'] or 'all'}, IO cores {budget['io_cpus'] or 'all'}"
+    )
+    return budget
+
+
+def pin_current_thread(cpus):
+    """Restrict the calling thread (and threads it starts later) to the given cores.
+
+    Args:
+        cpus: List of core numbers, or None/empty to leave the affinity unchanged
+    """
+    if not cpus or not hasattr(os, 'sched_setaffinity'):
+        return
+    available = os.sched_getaffinity(0) | set(range(os.cpu_count() or 1))
+    cpus = {cpu for cpu in cpus if cpu in available}
+    if not cpus:
+        logger.warning("None of the configured cores exist, CPU affinity unchanged")
+        return
+    # On Linux, pid 0 applies to the calling thread only
+    os.sched_setaffinity(0, cpus)
@@ -0,0 +1,228 @@
+"""
+Disk retention manager for the vespCV application.
+
+Every detection frame adds up to two full-resolution JPEGs (data/yolo_jpg_txt
+and images_folder) until the SD card is full. The retention manager keeps an
+index of the saved frames and, when the stored frames exceed the quota or
+the card runs low on space, deletes old frames down to a low-water mark:
+first every other old frame of the unprotected classes, then the oldest of
+the rest. Vespa velutina and high-confidence frames are never deleted. An
+image and its .txt label are always deleted together.
+
+The index is an append-only file that is replayed at startup, so the
+directories are only scanned once, when no index exists yet.
+"""
+
+import os
+import glob
+import time
+import shutil
+import threading
+
+from src.core.logger import logger
+from src.core.metrics import metrics
+
+INDEX_PATH = os.path.join('data', 'logs', 'retention_index.csv')
+
+
+class RetentionManager:
+    def __init__(self, config, index_path=INDEX_PATH):
+        """Initialize the manager and load or build the frame index.
+
+        Args:
+            config: Application configuration dictionary with a 'retention' section
+            index_path: Append-only index file
+        """
+        retention_config = config.get('retention', {})
+        self.quota_bytes = retention_config.get('quota_gb', 8) * 1024**3
+        self.low_water_bytes = retention_config.get('low_water_gb', 6) * 1024**3
+        self.min_free_bytes = retention_config.get('min_free_gb', 1) * 1024**3
+        self.keep_classes = set(retention_config.get('keep_classes', ['vvel']))
+        self.keep_confidence = retention_config.get('keep_confidence', 0.95)
+        self.thin_after = retention_config.get('thin_after_days', 7) * 86400
+        self.check_interval = retention_config.get('check_interval', 300)
+        self.directories = [os.path.join('data', 'yolo_jpg_txt'), config['images_folder']]
+
+        self.index_path = index_path
+        self._entries = {}  # path -> (timestamp, class name, confidence, bytes), oldest first
+        self._tombstones = 0
+        self.total_bytes = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        if os.path.exists(index_path):
+            self._load_index()
+        else:
+            self._build_index()
+
+    def _load_index(self):
+        """Replay the append-only index file."""
+        with open(self.index_path, 'r') as f:
+            for line in f:
+                fields = line.rstrip('\n').split(',', 5)
+                if fields[0] == '+' and len(fields) == 6:
+                    self._add(fields[5], float(fields[1]), fields[2], float(fields[3]), int(fields[4]))
+                elif fields[0] == '-' and len(fields) == 2:
+                    self._remove(fields[1])
+                    self._tombstones += 1
+        logger.info(f"Retention index loaded: {len(self._entries)} frames, {self.total_bytes / 1024**3:.2f} GB")
+
+    def _build_index(self):
+        """Scan the frame directories once and write a fresh index."""
+        for directory in self.directories:
+            for path in glob.glob(os.path.join(directory, '*.jpg')):
+                if os.path.basename(path).startswith(('image_', 'burst_')):
+                    continue  # Working files of the capture cycle
+                class_name, confidence = _parse_filename(path)
+                self._add(path, os.path.getmtime(path), class_name, confidence, _pair_size(path))
+        self._entries = dict(sorted(self._entries.items(), key=lambda item: item[1][0]))
+        self._write_index()
+        logger.info(f"Retention index built: {len(self._entries)} frames, {self.total_bytes / 1024**3:.2f} GB")
+
+    def _write_index(self):
+        """Rewrite the index file without tombstones."""
+        os.makedirs(os.path.dirname(self.index_path) or '.', exist_ok=True)
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, 'w') as f:
+            for path, (timestamp, class_name, confidence, size) in self._entries.items():
+                f.write(f"+,{timestamp:.0f},{class_name},{confidence:.2f},{size},{path}\n")
+        os.replace(temp_path, self.index_path)
+        self._tombstones = 0
+
+    def _add(self, path, timestamp, class_name, confidence, size):
+        self._remove(path)
+        self._entries[path] = (timestamp, class_name, confidence, size)
+        self.total_bytes += size
+
+    def _remove(self, path):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self.total_bytes -= entry[3]
+
+    def register(self, path, class_name, confidence, timestamp):
+        """Add a newly saved frame (and its .txt label, if any) to the index."""
+        if not path or not os.path.exists(path):
+            return
+        size = _pair_size(path)
+        with self._lock:
+            self._add(path, timestamp, class_name, float(confidence), size)
+            with open(self.index_path, 'a') as f:
+                f.write(f"+,{timestamp:.0f},{class_name},{float(confidence):.2f},{size},{path}\n")
+        metrics.set_gauge('stored_frames_bytes', self.total_bytes)
+
+    def unregister(self, path):
+        """Drop a frame that was moved elsewhere (e.g. packed by the archive tier) from the index."""
+        with self._lock:
+            if path not in self._entries:
+                return
+            self._remove(path)
+            with open(self.index_path, 'a') as f:
+                f.write(f"-,{path}\n")
+            self._tombstones += 1
+
+    def is_protected(self, class_name, confidence):
+        """Return True for frames that are never deleted."""
+        return class_name in self.keep_classes or confidence >= self.keep_confidence
+
+    def start(self):
+        """Start enforcing the quota in a background thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="retention")
+            self._thread.start()
+            logger.info(f"Retention manager started (quota {self.quota_bytes / 1024**3:.1f} GB, "
+                        f"low-water {self.low_water_bytes / 1024**3:.1f} GB)")
+
+    def stop(self):
+        """Stop the background thread."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        """Check the quota until stopped."""
+        while True:
+            try:
+                self.enforce()
+            except Exception as e:
+                logger.error(f"Error in retention manager: {e}")
+            if self._stop_event.wait(self.check_interval):
+                break
+
+    def enforce(self, now=None):
+        """Delete frames when over quota or low on disk space.
+
+        Returns:
+            int: Bytes reclaimed
+        """
+        free_bytes = shutil.disk_usage(os.path.dirname(os.path.abspath(self.index_path))).free
+        metrics.set_gauge('stored_frames_bytes', self.total_bytes)
+        if self.total_bytes <= self.quota_bytes and free_bytes >= self.min_free_bytes:
+            return 0
+
+        # Reclaim down to the low-water mark, and at least enough to restore the free space
+        target = min(self.low_water_bytes, self.total_bytes - max(self.min_free_bytes - free_bytes, 0))
+        with self._lock:
+            candidates = [(path, entry) for path, entry in self._entries.items()
+                          if not self.is_protected(entry[1], entry[2])]
+
+        now = now if now is not None else time.time()
+        old = [item for item in candidates if now - item[1][0] >= self.thin_after]
+        # Thin the old history first (every other frame), then delete the oldest remaining frames
+        thinned = old[1::2]
+        thinned_paths = {path for path, _ in thinned}
+        order = thinned + [item for item in candidates if item[0] not in thinned_paths]
+
+        reclaimed = 0
+        deleted = {}
+        deleted_paths = []
+        for path, (_, class_name, _, size) in order:
+            if self.total_bytes - reclaimed <= target:
+                break
+            self._delete_pair(path)
+            reclaimed += size
+            deleted[class_name] = deleted.get(class_name, 0) + 1
+            deleted_paths.append(path)
+
+        with self._lock:
+            with open(self.index_path, 'a') as f:
+                for path in deleted_paths:
+                    self._remove(path)
+                    f.write(f"-,{path}\n")
+            self._tombstones += len(deleted_paths)
+            if self._tombstones > len(self._entries):
+                self._write_index()
+
+        metrics.inc('retention_deleted_frames_total', len(deleted_paths))
+        metrics.set_gauge('stored_frames_bytes', self.total_bytes)
+        summary = ', '.join(f"{count} {name}" for name, count in sorted(deleted.items())) or "nothing"
+        logger.info(f"Retention reclaimed {reclaimed / 1024**2:.0f} MB ({summary}); "
+                    f"{len(self._entries)} frames, {self.total_bytes / 1024**3:.2f} GB stored")
+        if self.total_bytes > target:
+            logger.warning("Retention target not reached: the remaining frames are protected "
+                           "(keep_classes/keep_confidence)")
+        return reclaimed
+
+    def _delete_pair(self, path):
+        """Delete an image and its .txt label."""
+        for file_path in (path, os.path.splitext(path)[0] + '.txt'):
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+
+
+def _pair_size(path):
+    """Return the size of an image plus its .txt label."""
+    txt_path = os.path.splitext(path)[0] + '.txt'
+    return os.path.getsize(path) + (os.path.getsize(txt_path) if os.path.exists(txt_path) else 0)
+
+
+def _parse_filename(path):
+    """Return (class name, confidence) from a class-confidence-date-time.jpg name."""
+    parts = os.path.basename(path).split('-')
+    try:
+        return parts[0], float(parts[1])
+    except (IndexError, ValueError):
+        return 'no_detection', 0.0
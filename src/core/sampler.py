@@ -0,0 +1,112 @@
+"""
+Active-learning sampler for the training frames of the vespCV application.
+
+Saving every confident frame fills data/yolo_jpg_txt with examples the model
+already gets right, while the frames it struggles with are thrown away. The
+sampler looks at the raw boxes of a frame, before the confidence threshold,
+and keeps it for training with a reason code:
+
+    disagreement  overlapping boxes of different hornet species
+    uncertain     a box with a confidence inside the uncertainty band
+    confident     confident detections only; rate-limited per class
+    negative      no boxes; a small random, rate-limited sample
+
+Every kept frame is saved with its YOLO labels and listed in
+data/logs/sampling.log together with its reason code.
+"""
+
+import os
+import time
+import random
+
+import numpy as np
+
+from src.core.logger import EventLog
+from src.core.metrics import metrics
+from src.utils.box_utils import iou_matrix
+
+LOG_PATH = os.path.join('data', 'logs', 'sampling.log')
+
+
+class ActiveLearningSampler:
+    def __init__(self, config, log_path=LOG_PATH):
+        """Initialize the sampler.
+
+        Args:
+            config: Application configuration dictionary with a 'sampling' section
+            log_path: CSV file listing the kept frames and their reason codes
+        """
+        sampling_config = config.get('sampling', {})
+        self.class_names = config['class_names']
+        self.band_low, self.band_high = sampling_config.get('uncertainty_band', [0.3, 0.8])
+        self.species_ids = [self.class_names.index(name)
+                            for name in sampling_config.get('species_classes', ['vcra', 'vespsp', 'vvel'])]
+        self.disagreement_iou = sampling_config.get('disagreement_iou', 0.5)
+        self.confident_interval = sampling_config.get('confident_interval', 300)
+        self.always_keep = set(sampling_config.get('always_keep_classes', ['vvel']))
+        self.negative_rate = sampling_config.get('negative_rate', 0.02)
+        self.negative_interval = sampling_config.get('negative_interval', 600)
+        self.log = EventLog(log_path, "Timestamp,Reason,Class,Confidence,Image Path")
+        self._random = random.Random(sampling_config.get('seed'))
+
+        # Time a frame was last kept as 'confident' (per class) or 'negative'
+        self._last_kept = {}
+
+    def select(self, data, detections, now=None):
+        """Decide whether a frame is kept for training.
+
+        Args:
+            data: Raw (N, 6) or (N, 7) box array or tensor of the frame, before thresholds
+            detections: Detection info of the frame ('class' is the frame class)
+            now: Time in seconds (default: now)
+
+        Returns:
+            str: Reason code, or None when the frame is not kept
+        """
+        now = time.time() if now is None else now
+        if hasattr(data, 'cpu'):
+            data = data.cpu().numpy()
+        data = np.asarray(data, dtype=np.float32)
+        if data.ndim != 2:
+            data = data.reshape(-1, 6)
+        confidences = data[:, -2]
+        class_ids = data[:, -1].astype(np.int16)
+        # Boxes below the band are noise, not uncertainty
+        keep = confidences >= self.band_low
+        data, confidences, class_ids = data[keep], confidences[keep], class_ids[keep]
+
+        if len(data) == 0:
+            reason = 'negative' if self._random.random() < self.negative_rate \
+                and self._rate_ok('negative', self.negative_interval, now) else None
+        elif self._species_disagree(data[:, :4], class_ids):
+            reason = 'disagreement'
+        elif np.any(confidences < self.band_high):
+            reason = 'uncertain'
+        elif detections.get('class') in self.always_keep:
+            reason = 'confident'
+        else:
+            reason = 'confident' if self._rate_ok(detections.get('class'), self.confident_interval, now) else None
+
+        metrics.inc('sampling_frames_total', labels={'reason': reason or 'skipped'})
+        return reason
+
+    def _species_disagree(self, boxes, class_ids):
+        """Return True when boxes of different hornet species overlap (the same insect, two labels)."""
+        species = np.isin(class_ids, self.species_ids)
+        if np.count_nonzero(species) < 2:
+            return False
+        boxes, class_ids = boxes[species], class_ids[species]
+        overlaps = iou_matrix(boxes, boxes) >= self.disagreement_iou
+        return bool(np.any(overlaps & (class_ids[:, None] != class_ids[None, :])))
+
+    def _rate_ok(self, key, interval, now):
+        """Return True (and remember the time) when nothing was kept for key in the last interval."""
+        if now - self._last_kept.get(key, -np.inf) < interval:
+            return False
+        self._last_kept[key] = now
+        return True
+
+    def record(self, reason, detections, image_path):
+        """Append a kept frame and its reason code to the sampling log."""
+        self.log.write(f"{detections.get('timestamp')},{reason},{detections.get('class')},"
+                       f"{detections.get('confidence')},{image_path}")
@@ -0,0 +1,323 @@
+"""
+System telemetry sampler for the vespCV application.
+
+Reads /proc and /sys directly (no subprocesses) at a configurable interval:
+CPU load per core, CPU temperature, memory available, the RSS of this
+process, the Raspberry Pi throttling flags, SD-card read/write rates and free
+disk space. Samples go to a fixed-size binary ring file (data/logs/
+telemetry.bin) that the GUI and reports can query with TelemetryRing, so the
+file never grows. A one-line summary is logged every log_interval seconds.
+
+Usage:
+    python -m src.core.telemetry --since 3600 > telemetry.csv
+"""
+
+import os
+import time
+import shutil
+import argparse
+import threading
+
+import numpy as np
+
+from src.core.events import bus, SystemStats
+from src.core.logger import logger
+from src.core.metrics import metrics
+
+RING_PATH = os.path.join('data', 'logs', 'telemetry.bin')
+MAX_CORES = 8
+THROTTLED_PATH = '/sys/devices/platform/soc/soc:firmware/get_throttled'
+
+# One fixed-size record per sample; NaN marks a value that could not be read
+RECORD_DTYPE = np.dtype([
+    ('time', np.float64),
+    ('cpu_percent', np.uint8, MAX_CORES),  # Busy percentage per core since the previous sample
+    ('temperature', np.float32),           # CPU temperature in °C
+    ('mem_available_mb', np.float32),
+    ('rss_mb', np.float32),                # Resident memory of the vespCV process
+    ('throttled', np.uint32),              # Raspberry Pi get_throttled bit flags
+    ('read_kbps', np.float32),             # SD-card read rate
+    ('write_kbps', np.float32),            # SD-card write rate
+    ('disk_free_gb', np.float32),
+])
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S4'),
+    ('version', np.uint32),
+    ('capacity', np.uint32),
+    ('next', np.uint32),
+    ('count', np.uint64),
+    ('cores', np.uint32),
+    ('reserved', np.uint8, 4),
+])
+MAGIC = b'VTEL'
+VERSION = 1
+
+
+class TelemetryRing:
+    """Fixed-size ring of telemetry records in a memory-mapped file.
+
+    There is a single writer (the sampler); readers open the file read-only
+    and copy out the records they need.
+    """
+
+    def __init__(self, path=RING_PATH, capacity=None, cores=None):
+        """Open the ring file, creating it when capacity is given and the file is missing or different.
+
+        Args:
+            path: Ring file path
+            capacity: Number of records to keep, or None to open an existing file read-only
+            cores: Number of CPU cores that are recorded (at most MAX_CORES)
+        """
+        self.path = path
+        writable = capacity is not None
+        if writable and not self._matches(path, capacity):
+            self._create(path, capacity, cores or 1)
+        mode = 'r+' if writable else 'r'
+        self.header = np.memmap(path, dtype=HEADER_DTYPE, mode=mode, shape=(1,))
+        if self.header['magic'][0] != MAGIC or self.header['version'][0] != VERSION:
+            raise ValueError(f"{path} is not a telemetry ring file")
+        self.capacity = int(self.header['capacity'][0])
+        self.cores = int(self.header['cores'][0])
+        self.records = np.memmap(path, dtype=RECORD_DTYPE, mode=mode, offset=HEADER_DTYPE.itemsize,
+                                 shape=(self.capacity,))
+
+    @staticmethod
+    def _matches(path, capacity):
+        """Return True when an existing file has the current layout and capacity."""
+        if not os.path.exists(path) or os.path.getsize(path) != HEADER_DTYPE.itemsize + capacity * RECORD_DTYPE.itemsize:
+            return False
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        return header['magic'][0] == MAGIC and header['version'][0] == VERSION and header['capacity'][0] == capacity
+
+    @staticmethod
+    def _create(path, capacity, cores):
+        """Write an empty ring file."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header['magic'], header['version'], header['capacity'] = MAGIC, VERSION, capacity
+        header['cores'] = min(cores, MAX_CORES)
+        with open(path, 'wb') as f:
+            f.write(header.tobytes())
+            f.truncate(HEADER_DTYPE.itemsize + capacity * RECORD_DTYPE.itemsize)
+
+    def append(self, record):
+        """Write one RECORD_DTYPE record over the oldest one."""
+        index = int(self.header['next'][0])
+        self.records[index] = record
+        # Advance the header only after the record is complete
+        self.header['next'] = (index + 1) % self.capacity
+        self.header['count'] += 1
+
+    def read(self, since=None):
+        """Return the records in time order, optionally only those at or after `since` (epoch seconds)."""
+        index = int(self.header['next'][0])
+        count = int(self.header['count'][0])
+        if count < self.capacity:
+            records = np.array(self.records[:index])
+        else:
+            records = np.concatenate([self.records[index:], self.records[:index]])
+        if since is not None:
+            records = records[records['time'] >= since]
+        return records
+
+    def flush(self):
+        """Write the mapped pages to disk."""
+        self.records.flush()
+        self.header.flush()
+
+
+class TelemetrySampler:
+    def __init__(self, config):
+        """Initialize the sampler and open the ring file.
+
+        Args:
+            config: Application configuration dictionary with a 'telemetry' section
+        """
+        telemetry_config = config.get('telemetry', {})
+        self.interval = telemetry_config.get('interval', 10)
+        self.log_interval = telemetry_config.get('log_interval', 300)
+        self.block_device = telemetry_config.get('block_device', 'mmcblk0')
+        self.throttled_path = telemetry_config.get('throttled_path', THROTTLED_PATH)
+        self.cores = min(os.cpu_count() or 1, MAX_CORES)
+        self.ring = TelemetryRing(telemetry_config.get('ring_file', RING_PATH),
+                                  telemetry_config.get('capacity', 60480), self.cores)
+        self.timeseries = None
+        if config.get('timeseries', {}).get('enabled', False):
+            from src.core.timeseries import open_store
+            self.timeseries = open_store(config)
+
+        self._page_size = os.sysconf('SC_PAGE_SIZE')
+        self._previous_cpu = None
+        self._previous_io = None
+        self._last_log = 0.0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Sample in a background thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="telemetry")
+            self._thread.start()
+            logger.info(f"Telemetry sampler started (every {self.interval}s, {self.ring.capacity} samples "
+                        f"in {self.ring.path})")
+
+    def stop(self):
+        """Stop the sampling thread and flush the ring file."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+        self.ring.flush()
+
+    def _run(self):
+        """Sample until stopped."""
+        while True:
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"Error in telemetry sampler: {e}")
+            if self._stop_event.wait(self.interval):
+                break
+
+    def sample(self, now=None):
+        """Take one sample, append it to the ring and update the metrics gauges.
+
+        Returns:
+            np.void: The RECORD_DTYPE record
+        """
+        now = time.time() if now is None else now
+        record = np.zeros((), dtype=RECORD_DTYPE)
+        record['time'] = now
+        record['cpu_percent'][:self.cores] = self._cpu_percent()
+        record['temperature'] = _read_number('/sys/class/thermal/thermal_zone0/temp', 1000.0)
+        record['mem_available_mb'] = self._mem_available_mb()
+        record['rss_mb'] = self._rss_mb()
+        throttled = _read_number(self.throttled_path, base=16)
+        record['throttled'] = 0 if np.isnan(throttled) else int(throttled)
+        record['read_kbps'], record['write_kbps'] = self._io_rates(now)
+        record['disk_free_gb'] = shutil.disk_usage('/').free / 1024**3
+        self.ring.append(record)
+        if self.timeseries is not None:
+            self.timeseries.add_stats(now, float(record['temperature']), float(record['disk_free_gb']))
+        bus.publish(SystemStats(now, record))
+
+        if not np.isnan(record['temperature']):
+            metrics.set_gauge('cpu_temperature_celsius', round(float(record['temperature']), 1))
+        metrics.set_gauge('disk_free_gb', round(float(record['disk_free_gb']), 2))
+        metrics.set_gauge('mem_available_mb', round(float(record['mem_available_mb'])))
+        metrics.set_gauge('process_rss_mb', round(float(record['rss_mb'])))
+        metrics.set_gauge('cpu_throttled_flags', int(record['throttled']))
+
+        if now - self._last_log >= self.log_interval:
+            self._last_log = now
+            logger.info(
+                f"System: CPU {'/'.join(str(value) for value in record['cpu_percent'][:self.cores])}%, "
+                f"{float(record['temperature']):.1f}°C, {float(record['mem_available_mb']):.0f} MB available, "
+                f"RSS {float(record['rss_mb']):.0f} MB, throttled 0x{int(record['throttled']):x}, "
+                f"SD {float(record['read_kbps']):.0f}/{float(record['write_kbps']):.0f} kB/s read/write, "
+                f"{float(record['disk_free_gb']):.2f} GB free"
+            )
+        return record
+
+    def _cpu_percent(self):
+        """Return the busy percentage per core since the previous call (0 on the first call)."""
+        times = []
+        with open('/proc/stat', 'r') as f:
+            for line in f:
+                if line.startswith('cpu') and line[3].isdigit():
+                    values = [int(value) for value in line.split()[1:]]
+                    # user nice system idle iowait ...; idle and iowait count as not busy
+                    times.append((sum(values), values[3] + values[4]))
+        times = np.array(times[:self.cores], dtype=np.float64).reshape(-1, 2)
+        previous, self._previous_cpu = self._previous_cpu, times
+        if previous is None or previous.shape != times.shape:
+            return np.zeros(len(times), dtype=np.uint8)
+        total = np.maximum(times[:, 0] - previous[:, 0], 1)
+        busy = total - (times[:, 1] - previous[:, 1])
+        return np.clip(np.round(100 * busy / total), 0, 100).astype(np.uint8)
+
+    def _mem_available_mb(self):
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+        return np.nan
+
+    def _rss_mb(self):
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * self._page_size / 1024**2
+
+    def _io_rates(self, now):
+        """Return the (read, write) kB/s of the block device since the previous call."""
+        sectors = None
+        try:
+            with open('/proc/diskstats', 'r') as f:
+                for line in f:
+                    fields = line.split()
+                    if fields[2] == self.block_device:
+                        # Sectors read and written are always 512 bytes in diskstats
+                        sectors = (int(fields[5]), int(fields[9]))
+                        break
+        except OSError:
+            pass
+        if sectors is None:
+            return np.nan, np.nan
+        previous, self._previous_io = self._previous_io, (now, *sectors)
+        if previous is None or now <= previous[0]:
+            return 0.0, 0.0
+        elapsed = now - previous[0]
+        return ((sectors[0] - previous[1]) * 0.5 / elapsed, (sectors[1] - previous[2]) * 0.5 / elapsed)
+
+
+def _read_number(path, scale=1.0, base=10):
+    """Read a single number from a /sys file, or NaN when it is not available."""
+    try:
+        with open(path, 'r') as f:
+            return int(f.read().strip(), base) / scale
+    except (OSError, ValueError):
+        return np.nan
+
+
+_sampler = None
+
+def start_telemetry(config):
+    """Start the telemetry sampler if it is enabled in the config.
+
+    Returns:
+        TelemetrySampler or None
+    """
+    global _sampler
+    if not config.get('telemetry', {}).get('enabled', False):
+        return None
+    _sampler = TelemetrySampler(config)
+    _sampler.start()
+    return _sampler
+
+def stop_telemetry():
+    """Stop the telemetry sampler started by start_telemetry."""
+    if _sampler is not None:
+        _sampler.stop()
+
+
+def main():
+    """Print the telemetry ring as CSV."""
+    parser = argparse.ArgumentParser(description="Print vespCV telemetry samples as CSV.")
+    parser.add_argument('--file', default=RING_PATH, help="Telemetry ring file")
+    parser.add_argument('--since', type=float, default=None, help="Only the last N seconds")
+    args = parser.parse_args()
+
+    ring = TelemetryRing(args.file)
+    records = ring.read(time.time() - args.since if args.since else None)
+    cpu_columns = [f"cpu{core}_percent" for core in range(ring.cores)]
+    print(','.join(['time'] + cpu_columns + [name for name in RECORD_DTYPE.names if name not in ('time', 'cpu_percent')]))
+    for record in records:
+        values = [time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record['time']))]
+        values += [str(value) for value in record['cpu_percent'][:ring.cores]]
+        values += [f"{record['temperature']:.1f}", f"{record['mem_available_mb']:.0f}", f"{record['rss_mb']:.0f}",
+                   f"0x{int(record['throttled']):x}", f"{record['read_kbps']:.1f}", f"{record['write_kbps']:.1f}",
+                   f"{record['disk_free_gb']:.2f}"]
+        print(','.join(values))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+Pre-aggregated time series of detections and system stats.
+
+Detection counts per class and the mean CPU temperature and free disk space
+are kept per minute, hour and day in memory-mapped .npy files in
+data/timeseries. Each resolution is a ring of buckets: a bucket array holds
+the absolute bucket number stored in every slot, so a slot is reset when
+the ring wraps around and a range query is a vectorized gather instead of a
+scan of the raw logs. Buckets follow local wall-clock time, so a day runs
+from midnight to midnight.
+
+The store is backfilled once from detections.log, the telemetry ring file
+and an old system_stats.log, and is then updated on every detection and
+telemetry sample.
+
+Usage:
+    python -m src.core.timeseries --resolution hour --since-days 7 --class vvel
+"""
+
+import os
+import json
+import time
+import argparse
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from src.core.logger import logger
+
+DIRECTORY = os.path.join('data', 'timeseries')
+RESOLUTIONS = {'minute': 60, 'hour': 3600, 'day': 86400}
+STATS = ('temperature', 'disk_free_gb')
+
+
+def wall_clock(timestamp):
+    """Return local wall-clock seconds for epoch seconds (scalar or array)."""
+    timestamp = np.asarray(timestamp, dtype=np.float64)
+    offsets = np.vectorize(lambda t: time.localtime(t).tm_gmtoff, otypes=[np.float64])(timestamp)
+    return timestamp + offsets
+
+
+class TimeSeriesStore:
+    def __init__(self, config, read_only=False):
+        """Open (or create and backfill) the store.
+
+        Args:
+            config: Application configuration dictionary with a 'timeseries' section
+            read_only: Open the existing files read-only, without rebuilding or backfilling
+                (for readers outside the detector process)
+
+        Raises:
+            FileNotFoundError: read_only and the store has not been built with this layout
+        """
+        timeseries_config = config.get('timeseries', {})
+        self.directory = timeseries_config.get('directory', DIRECTORY)
+        self.class_names = list(config['class_names'])
+        self.slots = {
+            'minute': int(timeseries_config.get('minute_days', 7) * 1440),
+            'hour': int(timeseries_config.get('hour_days', 366) * 24),
+            'day': int(timeseries_config.get('day_years', 10) * 366),
+        }
+        self._lock = threading.Lock()
+
+        state_path = os.path.join(self.directory, 'state.json')
+        state = {}
+        if os.path.exists(state_path):
+            with open(state_path, 'r') as f:
+                state = json.load(f)
+        # A different class list or ring size means the files no longer fit; rebuild them
+        rebuild = state.get('class_names') != self.class_names or state.get('slots') != self.slots
+        if read_only:
+            if not state.get('backfilled'):
+                raise FileNotFoundError(f"No time series in {self.directory} yet; it is built when "
+                                        f"the detector runs with timeseries.enabled")
+            if rebuild:
+                raise FileNotFoundError(f"The time series in {self.directory} was built with other class "
+                                        f"names or history sizes; restart the detector to rebuild it")
+            self.arrays = {resolution: self._open(resolution, False, 'r') for resolution in RESOLUTIONS}
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.arrays = {resolution: self._open(resolution, rebuild) for resolution in RESOLUTIONS}
+
+        if rebuild or not state.get('backfilled'):
+            self.backfill(config)
+            with open(state_path, 'w') as f:
+                json.dump({'class_names': self.class_names, 'slots': self.slots, 'backfilled': True}, f)
+
+    def _open(self, resolution, create, mmap_mode='r+'):
+        """Open the memory-mapped arrays of one resolution."""
+        slots = self.slots[resolution]
+        shapes = {
+            'buckets': ((slots,), np.int64),
+            'counts': ((slots, len(self.class_names)), np.uint32),
+            'stats_sum': ((slots, len(STATS)), np.float32),
+            'stats_count': ((slots, len(STATS)), np.uint32),
+        }
+        arrays = {}
+        for name, (shape, dtype) in shapes.items():
+            path = os.path.join(self.directory, f"{resolution}_{name}.npy")
+            if create or not os.path.exists(path):
+                arrays[name] = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+                if name == 'buckets':
+                    arrays[name][:] = -1
+            else:
+                arrays[name] = np.load(path, mmap_mode=mmap_mode)
+        return arrays
+
+    def _slot(self, resolution, seconds):
+        """Return the slot for wall-clock seconds, resetting it when it still holds an older bucket.
+
+        Returns None when the slot already holds a newer bucket (the sample is older than the ring).
+        """
+        arrays = self.arrays[resolution]
+        bucket = int(seconds // RESOLUTIONS[resolution])
+        slot = bucket % self.slots[resolution]
+        if arrays['buckets'][slot] > bucket:
+            return None
+        if arrays['buckets'][slot] != bucket:
+            arrays['buckets'][slot] = bucket
+            arrays['counts'][slot] = 0
+            arrays['stats_sum'][slot] = 0
+            arrays['stats_count'][slot] = 0
+        return slot
+
+    def add_detection(self, class_name, timestamp=None):
+        """Count one detection of a class at epoch seconds (default: now)."""
+        if class_name not in self.class_names:
+            return
+        seconds = float(wall_clock(time.time() if timestamp is None else timestamp))
+        class_id = self.class_names.index(class_name)
+        with self._lock:
+            for resolution in RESOLUTIONS:
+                slot = self._slot(resolution, seconds)
+                if slot is not None:
+                    self.arrays[resolution]['counts'][slot, class_id] += 1
+
+    def add_stats(self, timestamp=None, temperature=None, disk_free_gb=None):
+        """Add a system stats sample; None or NaN values are skipped."""
+        values = np.array([np.nan if value is None else value for value in (temperature, disk_free_gb)],
+                          dtype=np.float32)
+        present = ~np.isnan(values)
+        if not present.any():
+            return
+        seconds = float(wall_clock(time.time() if timestamp is None else timestamp))
+        with self._lock:
+            for resolution in RESOLUTIONS:
+                arrays = self.arrays[resolution]
+                slot = self._slot(resolution, seconds)
+                if slot is None:
+                    continue
+                arrays['stats_sum'][slot, present] += values[present]
+                arrays['stats_count'][slot, present] += 1
+
+    def _range(self, resolution, start, end):
+        """Return (bucket numbers, slots, valid mask) for the buckets overlapping [start, end) epoch seconds."""
+        size = RESOLUTIONS[resolution]
+        first = int(wall_clock(start) // size)
+        last = int(np.ceil(wall_clock(end) / size))
+        first = max(first, last - self.slots[resolution])  # Older buckets are no longer in the ring
+        buckets = np.arange(first, last, dtype=np.int64)
+        slots = buckets % self.slots[resolution]
+        return buckets, slots, self.arrays[resolution]['buckets'][slots] == buckets
+
+    def counts(self, resolution, start, end=None):
+        """Return detection counts per bucket and class.
+
+        Args:
+            resolution: 'minute', 'hour' or 'day'
+            start: Epoch seconds of the range start
+            end: Epoch seconds of the range end (default: now)
+
+        Returns:
+            tuple: (bucket start times as datetime64[s] local time, (n, classes) uint32 counts)
+        """
+        end = time.time() if end is None else end
+        with self._lock:
+            buckets, slots, valid = self._range(resolution, start, end)
+            counts = np.where(valid[:, None], self.arrays[resolution]['counts'][slots], 0).astype(np.uint32)
+        return (buckets * RESOLUTIONS[resolution]).astype('datetime64[s]'), counts
+
+    def stats(self, resolution, start, end=None):
+        """Return the mean temperature and free disk space per bucket (NaN without samples).
+
+        Returns:
+            tuple: (bucket start times as datetime64[s] local time, (n, 2) float32 means in STATS order)
+        """
+        end = time.time() if end is None else end
+        with self._lock:
+            buckets, slots, valid = self._range(resolution, start, end)
+            sums = self.arrays[resolution]['stats_sum'][slots]
+            samples = np.where(valid[:, None], self.arrays[resolution]['stats_count'][slots], 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(samples > 0, sums / samples, np.nan).astype(np.float32)
+        return (buckets * RESOLUTIONS[resolution]).astype('datetime64[s]'), means
+
+    def flush(self):
+        """Write the mapped pages to disk."""
+        with self._lock:
+            for arrays in self.arrays.values():
+                for array in arrays.values():
+                    array.flush()
+
+    def backfill(self, config):
+        """Load the existing detection and system stats history into the store."""
+        detections = 0
+        log_path = os.path.join('data', 'logs', 'detections.log')
+        if os.path.exists(log_path):
+            with open(log_path, 'r') as f:
+                next(f, None)  # Header
+                for line in f:
+                    fields = line.split(',', 3)
+                    try:
+                        timestamp = time.mktime(time.strptime(fields[0], "%Y%m%d-%H%M%S"))
+                    except (ValueError, IndexError):
+                        continue
+                    self.add_detection(fields[1], timestamp)
+                    detections += 1
+
+        samples = 0
+        stats_path = os.path.join('data', 'logs', 'system_stats.log')  # Written by earlier versions
+        if os.path.exists(stats_path):
+            with open(stats_path, 'r') as f:
+                for line in f:
+                    fields = line.strip().split(',')
+                    try:
+                        timestamp = datetime.strptime(fields[0], '%Y-%m-%d %H:%M:%S').timestamp()
+                    except (ValueError, IndexError):
+                        continue
+                    self.add_stats(timestamp, _to_float(fields[1]), _to_float(fields[3]) if len(fields) > 3 else None)
+                    samples += 1
+
+        from src.core.telemetry import TelemetryRing, RING_PATH
+        ring_path = config.get('telemetry', {}).get('ring_file', RING_PATH)
+        if os.path.exists(ring_path):
+            try:
+                for record in TelemetryRing(ring_path).read():
+                    self.add_stats(float(record['time']), float(record['temperature']),
+                                   float(record['disk_free_gb']))
+                    samples += 1
+            except ValueError as e:
+                logger.warning(f"Telemetry not backfilled: {e}")
+
+        self.flush()
+        logger.info(f"Time series backfilled with {detections} detections and {samples} stats samples")
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def open_store(config):
+    """Return the process-wide store, opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TimeSeriesStore(config)
+        return _store
+
+
+def main():
+    """Print detection counts or system stats per bucket."""
+    from src.core.config_loader import load_config
+    config = load_config()
+
+    parser = argparse.ArgumentParser(description="Query the vespCV detection and system stats time series.")
+    parser.add_argument('--resolution', choices=list(RESOLUTIONS), default='hour')
+    parser.add_argument('--since-days', type=float, default=1.0, help="Range to print, ending now")
+    parser.add_argument('--class', dest='class_name', help="Only this class (default: all classes)")
+    parser.add_argument('--stats', action='store_true', help="Print temperature and free disk space instead")
+    args = parser.parse_args()
+
+    # Read-only: the running detector owns the files, and only it may rebuild or backfill them
+    try:
+        store = TimeSeriesStore(config, read_only=True)
+    except FileNotFoundError as e:
+        parser.exit(1, f"{e}\n")
+    start = time.time() - args.since_days * 86400
+    if args.stats:
+        times, values = store.stats(args.resolution, start)
+        print(','.join(('time',) + STATS))
+        for bucket_time, row in zip(times, values):
+            print(f"{bucket_time},{row[0]:.1f},{row[1]:.2f}")
+        return
+
+    times, counts = store.counts(args.resolution, start)
+    names = [args.class_name] if args.class_name else store.class_names
+    columns = [store.class_names.index(name) for name in names]
+    print(','.join(['time'] + names))
+    for bucket_time, row in zip(times, counts):
+        print(','.join([str(bucket_time)] + [str(row[column]) for column in columns]))
+    print(','.join(['total'] + [str(counts[:, column].sum()) for column in columns]))
+
+
+if __name__ == "__main__":
+    main()
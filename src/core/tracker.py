@@ -0,0 +1,165 @@
+"""
+Multi-frame confirmation tracker for the vespCV application.
+
+Associates hornet boxes across consecutive frames by IoU and only confirms a
+track after it was seen in K of the last N frames. Each confirmed track
+raises a single alert, so the same individual does not fire the GPIO or
+mail alert repeatedly.
+"""
+
+import numpy as np
+
+from src.core.logger import logger
+from src.utils.box_utils import iou_matrix
+
+
+class HornetTracker:
+    def __init__(self, confirm_hits=2, window=3, iou_threshold=0.3, max_tracks=32):
+        """Initialize the tracker.
+
+        Args:
+            confirm_hits: Number of frames (K) a track must be seen in before it is confirmed
+            window: Number of most recent frames (N) considered for confirmation
+            iou_threshold: Minimum IoU to associate a box with an existing track
+            max_tracks: Capacity of the track arrays
+        """
+        if not 1 <= confirm_hits <= window <= 32:
+            raise ValueError("Tracker requires 1 <= confirm_hits <= window <= 32")
+
+        self.confirm_hits = confirm_hits
+        self.window_mask = np.uint32((1 << window) - 1)
+        self.iou_threshold = iou_threshold
+        self._next_id = 1
+
+        # Track state, one row per slot; ids of -1 mark free slots
+        self.ids = np.full(max_tracks, -1, dtype=np.int32)
+        self.boxes = np.zeros((max_tracks, 4), dtype=np.float32)
+        self.history = np.zeros(max_tracks, dtype=np.uint32)  # bit i set = seen i frames ago
+        self.first_seen = np.zeros(max_tracks, dtype=np.float64)
+        self.last_seen = np.zeros(max_tracks, dtype=np.float64)
+        self.confirmed = np.zeros(max_tracks, dtype=bool)
+        self.alerted = np.zeros(max_tracks, dtype=bool)
+
+        # Statistics
+        self.frames_with_hornet = 0
+        self.alerts = 0
+        self.unconfirmed_tracks = 0
+        # Running alert latency totals; self.alerts is the count
+        self.alert_latency_sum = 0.0
+        self.alert_latency_max = 0.0
+
+    def update(self, boxes, timestamp):
+        """Associate this frame's boxes with the tracks and advance the history.
+
+        Must be called for every processed frame, also when no boxes were found,
+        so that tracks age out.
+
+        Args:
+            boxes: (K, 4) array of normalized xyxy boxes of the tracked classes
+            timestamp: Frame time in seconds
+
+        Returns:
+            tuple: ((K,) int32 array of track ids, list of track ids that should alert now)
+        """
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        if len(boxes):
+            self.frames_with_hornet += 1
+
+        active = self.ids >= 0
+        self.history[active] = (self.history[active] << np.uint32(1)) & self.window_mask
+
+        track_ids = np.full(len(boxes), -1, dtype=np.int32)
+        matched_slots, matched_boxes = self._associate(boxes, np.flatnonzero(active))
+        for slot, box_index in zip(matched_slots, matched_boxes):
+            self.boxes[slot] = boxes[box_index]
+            self.history[slot] |= np.uint32(1)
+            self.last_seen[slot] = timestamp
+            track_ids[box_index] = self.ids[slot]
+
+        for box_index in np.flatnonzero(track_ids < 0):
+            track_ids[box_index] = self._start_track(boxes[box_index], timestamp)
+
+        return track_ids, self._confirm_and_expire(timestamp)
+
+    def _associate(self, boxes, slots):
+        """Greedily match boxes to track slots by descending IoU."""
+        if len(boxes) == 0 or len(slots) == 0:
+            return [], []
+        overlaps = iou_matrix(self.boxes[slots], boxes)
+        matched_slots, matched_boxes = [], []
+        for flat_index in np.argsort(-overlaps, axis=None):
+            row, col = divmod(int(flat_index), overlaps.shape[1])
+            if overlaps[row, col] < self.iou_threshold:
+                break
+            if row in matched_slots or col in matched_boxes:
+                continue
+            matched_slots.append(row)
+            matched_boxes.append(col)
+        return [slots[row] for row in matched_slots], matched_boxes
+
+    def _start_track(self, box, timestamp):
+        """Start a new track in a free slot, evicting the stalest track when full."""
+        free = np.flatnonzero(self.ids < 0)
+        slot = free[0] if len(free) else int(np.argmin(self.last_seen))
+        if not len(free):
+            self._end_track(slot)
+
+        track_id = self._next_id
+        self._next_id += 1
+        self.ids[slot] = track_id
+        self.boxes[slot] = box
+        self.history[slot] = 1
+        self.first_seen[slot] = timestamp
+        self.last_seen[slot] = timestamp
+        self.confirmed[slot] = False
+        self.alerted[slot] = False
+        return track_id
+
+    def _confirm_and_expire(self, timestamp):
+        """Confirm tracks seen in K of N frames and free tracks not seen in N frames."""
+        active = self.ids >= 0
+        hits = np.bitwise_count(self.history)
+        newly_confirmed = np.flatnonzero(active & ~self.confirmed & (hits >= self.confirm_hits))
+        alerts = []
+        for slot in newly_confirmed:
+            self.confirmed[slot] = True
+            self.alerted[slot] = True
+            latency = timestamp - self.first_seen[slot]
+            self.alert_latency_sum += latency
+            self.alert_latency_max = max(self.alert_latency_max, latency)
+            self.alerts += 1
+            alerts.append(int(self.ids[slot]))
+            logger.info(f"Hornet track {self.ids[slot]} confirmed after {latency:.1f}s")
+
+        expired = np.flatnonzero(active & (self.history == 0))
+        for slot in expired:
+            self._end_track(slot)
+
+        if alerts or len(expired):
+            stats = self.get_stats()
+            logger.info("Tracker: %d alerts, %d unconfirmed tracks (%.0f%% suppressed), "
+                        "mean alert latency %.1fs",
+                        stats['alerts'], stats['unconfirmed_tracks'],
+                        100 * stats['suppressed_alert_rate'], stats['mean_alert_latency_s'])
+        return alerts
+
+    def _end_track(self, slot):
+        """Free a track slot and count tracks that never reached confirmation."""
+        if not self.confirmed[slot]:
+            self.unconfirmed_tracks += 1
+            logger.info(f"Hornet track {self.ids[slot]} expired unconfirmed; alert suppressed")
+        self.ids[slot] = -1
+        self.history[slot] = 0
+
+    def get_stats(self):
+        """Return alert latency and suppression statistics."""
+        total_tracks = self.alerts + self.unconfirmed_tracks
+        return {
+            'frames_with_hornet': self.frames_with_hornet,
+            'alerts': self.alerts,
+            'unconfirmed_tracks': self.unconfirmed_tracks,
+            # Share of tracks that would have alerted on a single frame but were never confirmed
+            'suppressed_alert_rate': self.unconfirmed_tracks / total_tracks if total_tracks else 0.0,
+            'mean_alert_latency_s': float(self.alert_latency_sum / self.alerts) if self.alerts else 0.0,
+            'max_alert_latency_s': float(self.alert_latency_max),
+        }
@@ -20,9 +20,13 @@ from tkinter import scrolledtext
 
 # Local application/library imports
 from src.core.detector import DetectionController
+from src.core.events import bus, DetectionConfirmed
+from src.core.metrics import metrics
 from src.utils.gpio_controller import GPIOController
-from src.utils.mail_utils import prepare_and_send_detection_email  # Update import
+from src.utils.mail_utils import AlertMailer
+from src.utils.detection_utils import read_recent_detections
 from src.utils.image_utils import ImageHandler, create_placeholder_image, create_thumbnail
+from src.utils.profiler import SamplingProfiler
 
 class ImageHandler:
     def __init__(self, logger):
@@ -66,6 +70,9 @@ class ImageHandler:
                 # Calculate new dimensions
                 new_width = int(img_width * scale_factor)
                 new_height = int(img_height * scale_factor)
+
+                # Let the JPEG decoder scale down by up to 8x instead of decoding the full frame
+                img.draft('RGB', (new_width, new_height))
                 
                 # Resize image using LANCZOS resampling for better quality
                 img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
@@ -91,6 +98,8 @@ class ImageHandler:
             return None
 
 class vespcvGUI(tk.Tk):
+    CHART_INTERVALS = 10  # Number of intervals shown in the detection chart
+
     def __init__(self, config):
         super().__init__()
         self.config = config
@@ -115,11 +124,17 @@ class vespcvGUI(tk.Tk):
         self.led_controller = GPIOController()
         self.led_controller.set_enabled(self.config.get('led', {}).get('enabled', False))
         
-        # Initialize a flag to track if the email has been sent
-        self.email_sent = False
+        # The mail alert is sent by its own event bus subscriber, so the GUI never waits for the mail server
+        self.mailer = AlertMailer(self.config.get('mail_alert_enabled', False),
+                                  on_sent=lambda: self.after(0, self._on_email_sent))
+        self._mail_subscription = bus.subscribe('mail', self.mailer.handle, (DetectionConfirmed,),
+                                                maxsize=1, drop='newest')
 
         # Initialize components
         self._init_components()
+
+        # Fill the chart with the detections of the last chart window before the restart
+        self._load_chart_history()
         
         # Initialize detection controller with our LED controller
         self.detector = DetectionController(self.handle_detection_result, self.led_controller)
@@ -149,6 +164,11 @@ class vespcvGUI(tk.Tk):
         # Bind the close event to the on_close method
         self.protocol("WM_DELETE_WINDOW", self.on_close)
 
+        # On-demand profiler, Ctrl+P records a profile of all threads
+        profiler_config = self.config.get('profiler', {})
+        self.profiler = SamplingProfiler(interval=profiler_config.get('interval', 0.01))
+        self.bind_all('<Control-p>', self.start_profiling)
+
     def _init_components(self):
         """Initialize all GUI components."""
         # Initialize image queue and handlers
@@ -360,13 +380,33 @@ class vespcvGUI(tk.Tk):
             time.sleep(0.5)
             self.logger.info("Detection stopped")
 
-    def handle_detection_result(self, result):
-        """Handle detection results from the detector."""
-        # Use self.after() to update GUI elements safely
-        self.after(0, self.update_gui_with_result, result)
+    def start_profiling(self, event=None):
+        """Record a profile of all threads without interrupting detection."""
+        duration = self.config.get('profiler', {}).get('duration', 30)
+        if self.profiler.start(duration):
+            self.logger.info(f"Profiling for {duration}s, results go to data/logs/")
 
-    def update_gui_with_result(self, result):
+    def handle_detection_result(self, result):
+        """Handle detection results from the detector (results subscriber thread)."""
+        # Use self.after() to update GUI elements safely, and wait until the update is drawn
+        # so a busy GUI drops old results on the bus instead of queueing them in Tk
+        done = threading.Event()
+        metrics.add_gauge('gui_pending_updates', 1)
+        self.after(0, self.update_gui_with_result, result, done)
+        done.wait(timeout=5)
+
+    def update_gui_with_result(self, result, done=None):
         """Update the GUI with the latest detection result."""
+        metrics.add_gauge('gui_pending_updates', -1)
+        try:
+            with metrics.span('gui_update'):
+                self._update_gui_with_result(result)
+        finally:
+            if done is not None:
+                done.set()
+
+    def _update_gui_with_result(self, result):
+        """Update the live feed, log and charts for one result."""
         try:
             # Update live feed with annotated image
             annotated_path = result.get("annotated_path")
@@ -406,28 +446,41 @@ class vespcvGUI(tk.Tk):
 
             # Refresh saved detections
             self.refresh_saved_detections()
-
-            # Check for vvel detection and send email if mail alert is active
-            if (detected_class == "vvel" and 
-                not self.email_sent and 
-                self.mail_button.cget('style') == 'Blue.TButton'):
-                try:
-                    # Send email using the new function
-                    if prepare_and_send_detection_email(
-                        timestamp,
-                        confidence,
-                        annotated_path,
-                        os.path.join(self.config['images_folder'], 'image_for_detection.jpg')
-                    ):
-                        # Only update button state and flag if email was sent successfully
-                        self.mail_button.configure(style='LED.TButton')  # Change back to gray
-                        self.email_sent = True
-                        self.logger.info("Warning email sent for vvel detection")
-                except Exception as e:
-                    self.logger.error(f"Failed to send warning email: {e}")
         except Exception as e:
             self.logger.error(f"Error updating GUI: {e}")
 
+    def _load_chart_history(self):
+        """Restore detection_timeline and detection_counts for the chart window.
+
+        Uses the per-minute counts of the time series store when it is enabled,
+        otherwise a tail-seek of detections.log; both only read the window, so
+        startup does not slow down as the history grows.
+        """
+        window_start = time.time() - self.CHART_INTERVALS * self.config.get('chart_interval', 1) * 60
+        try:
+            if self.config.get('timeseries', {}).get('enabled', False):
+                from src.core.timeseries import open_store
+                store = open_store(self.config)
+                times, counts = store.counts('minute', window_start)
+                timeline = [
+                    (bucket_time.astype(datetime).strftime("%Y%m%d-%H%M%S"), class_name)
+                    for bucket_time, row in zip(times, counts)
+                    for class_name, count in zip(store.class_names, row)
+                    for _ in range(count)
+                ]
+            else:
+                timeline = read_recent_detections(window_start)
+        except Exception as e:
+            self.logger.error(f"Error loading chart history: {e}")
+            return
+
+        self.detection_timeline = timeline
+        self.detection_counts = {}
+        for _, class_name in timeline:
+            self.detection_counts[class_name] = self.detection_counts.get(class_name, 0) + 1
+        self.redraw_combined_chart()
+        self.logger.info(f"Chart restored with {len(timeline)} detections")
+
     def _update_charts(self, detection):
         """Update the charts with new detection data."""
         detected_class = detection.get('class')
@@ -540,7 +593,7 @@ class vespcvGUI(tk.Tk):
             # Get current time and interval settings
             now = datetime.now()
             interval_minutes = self.config.get('chart_interval', 1)
-            N = 10  # Number of intervals to show
+            N = self.CHART_INTERVALS
             interval_format = "%H:%M"
 
             # Build a list of the last N intervals ending with the current one
@@ -723,7 +776,7 @@ class vespcvGUI(tk.Tk):
 
     def on_mail_button_click(self):
         """Handle the MAIL button click event."""
-        if not self.email_sent:  # Check if the email has already been sent
+        if not self.mailer.sent:  # Check if the email has already been sent
             # Assuming you have a method to check for vvel detection
             if self.detector.is_vvel_detected():  # Replace with your actual detection check
                 # Change button color to blue
@@ -738,20 +791,26 @@ class vespcvGUI(tk.Tk):
 
                 # Send the email
                 send_warning_email(subject, body, annotated_image_path, non_annotated_image_path)
-                self.email_sent = True  # Set the flag to true after sending the email
+                self.mailer.sent = True  # Set the flag to true after sending the email
                 tk.messagebox.showinfo("Email Sent", "The email has been sent successfully!")
             else:
                 tk.messagebox.showwarning("No Detection", "No Vespa velutina detected yet.")
         else:
             tk.messagebox.showinfo("Email Already Sent", "The email has already been sent.")
 
+    def _on_email_sent(self):
+        """Show the mail alert as used up once the warning email was sent."""
+        self.mail_button.configure(style='LED.TButton')  # Change back to gray
+
     def toggle_mail_alert(self):
         """Toggle the mail alert functionality."""
-        if not self.email_sent:  # Only allow toggling if email hasn't been sent yet
-            if self.mail_button.cget('style') == 'LED.TButton':  # Currently gray (inactive)
+        if not self.mailer.sent:  # Only allow toggling if email hasn't been sent yet
+            if not self.mailer.enabled:  # Currently gray (inactive)
+                self.mailer.enabled = True
                 self.mail_button.configure(style='Blue.TButton')  # Change to blue (active)
                 self.logger.info("Mail alert activated - will send email on first vvel detection")
             else:  # Currently blue (active)
+                self.mailer.enabled = False
                 self.mail_button.configure(style='LED.TButton')  # Change back to gray (inactive)
                 self.logger.info("Mail alert deactivated")
         else:
@@ -789,6 +848,7 @@ class vespcvGUI(tk.Tk):
             # Cleanup detector
             if hasattr(self, 'detector'):
                 self.detector.shutdown()
+            bus.unsubscribe(self._mail_subscription)
             
             # Destroy the window
             self.destroy()
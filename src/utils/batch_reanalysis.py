@@ -0,0 +1,333 @@
+"""
+Offline batch re-analysis of archived images with a (new) model.
+
+Streams images from one or more directories, decodes them in a process pool
+with a bounded prefetch window, batches them through the model and writes
+YOLO labels, a detections.log in the usual CSV format and a diff against the
+previous labels. Progress is recorded per batch, so an interrupted run
+continues where it stopped.
+
+Usage:
+    python -m src.utils.batch_reanalysis data/yolo_jpg_txt /home/vcv/vespcv/data/images \\
+        --output data/reanalysis --model runs/detect/train/weights/best.pt
+"""
+
+import os
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+from ultralytics import YOLO
+
+from src.core.logger import logger
+from src.core.config_loader import load_config
+from src.utils.detection_utils import format_yolo_labels, read_yolo_labels
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# JPEG DCT scaling lets libjpeg decode at 1/2, 1/4 or 1/8 size for a fraction of the cost
+REDUCED_READ_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                      (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+
+def iter_images(directories):
+    """Yield image paths from the given directories in a stable order."""
+    for directory in directories:
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS) and not name.startswith(('image_', 'burst_')):
+                    yield os.path.join(root, name)
+
+
+def label_roots(directories):
+    """Return (absolute directory, name under labels/) pairs, deepest directory first.
+
+    The name is the directory's base name, with a suffix when two inputs share it.
+    """
+    roots, used = [], set()
+    for directory in directories:
+        root = os.path.abspath(directory)
+        name = os.path.basename(root) or 'root'
+        suffix = 2
+        while name in used:
+            name = f"{os.path.basename(root) or 'root'}_{suffix}"
+            suffix += 1
+        used.add(name)
+        roots.append((root, name))
+    return sorted(roots, key=lambda item: len(item[0]), reverse=True)
+
+
+def decode_image(path, min_side):
+    """Decode an image at the smallest JPEG scale that keeps its short side >= min_side.
+
+    Runs in a worker process. Labels are normalized, so the reduced size does
+    not change the label coordinates.
+
+    Returns:
+        tuple: (path, BGR array or None)
+    """
+    img = None
+    if min_side and path.lower().endswith(('.jpg', '.jpeg')):
+        with open(path, 'rb') as f:
+            header = f.read(64 * 1024)
+        size = _jpeg_size(header)
+        if size:
+            short_side = min(size)
+            for factor, flag in REDUCED_READ_FLAGS:
+                if short_side // factor >= min_side:
+                    img = cv2.imread(path, flag)
+                    break
+    if img is None:
+        img = cv2.imread(path)
+    return path, img
+
+
+def _jpeg_size(data):
+    """Return (width, height) from a JPEG header, or None."""
+    index = 2
+    while index + 9 < len(data):
+        if data[index] != 0xFF:
+            return None
+        marker = data[index + 1]
+        length = int.from_bytes(data[index + 2:index + 4], 'big')
+        if marker in (0xC0, 0xC1, 0xC2):
+            height = int.from_bytes(data[index + 5:index + 7], 'big')
+            width = int.from_bytes(data[index + 7:index + 9], 'big')
+            return width, height
+        index += 2 + length
+    return None
+
+
+def prefetch(executor, paths, min_side, depth):
+    """Yield decoded images in order while keeping depth decodes in flight."""
+    pending = deque()
+    for path in paths:
+        pending.append(executor.submit(decode_image, path, min_side))
+        if len(pending) >= depth:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def batched(items, size):
+    """Yield lists of up to size items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def summarize(boxes, class_names, conf_threshold, priority_class='vvel'):
+    """Return (class name, confidence) for a frame, preferring the priority class."""
+    confident = [box for box in boxes if box[4] > conf_threshold]
+    if not confident:
+        return 'no_detection', 0.0
+    priority_id = class_names.index(priority_class)
+    priority = [box for box in confident if int(box[5]) == priority_id]
+    best = max(priority or confident, key=lambda box: box[4])
+    return class_names[int(best[5])], best[4]
+
+
+def previous_classes(image_path):
+    """Return the set of class ids labelled for an image before re-analysis.
+
+    Uses the .txt next to the image when present, otherwise the class prefix
+    of archived file names (class-confidence-date-time.jpg).
+    """
+    txt_path = os.path.splitext(image_path)[0] + '.txt'
+    if os.path.exists(txt_path):
+        return {label[0] for label in read_yolo_labels(txt_path)}, 'labels'
+    return None, os.path.basename(image_path).split('-')[0]
+
+
+def file_timestamp(image_path):
+    """Return the capture timestamp from an archived file name, or from its mtime."""
+    parts = os.path.splitext(os.path.basename(image_path))[0].split('-')
+    if len(parts) >= 4 and len(parts[2]) == 8 and len(parts[3]) == 6:
+        return f"{parts[2]}-{parts[3]}"
+    return time.strftime("%Y%m%d-%H%M%S", time.localtime(os.path.getmtime(image_path)))
+
+
+class ReanalysisWriter:
+    """Writes labels, detections.log, diff.csv and the progress file of a run."""
+
+    def __init__(self, output_dir, class_names, directories):
+        self.class_names = class_names
+        self.labels_dir = os.path.join(output_dir, 'labels')
+        os.makedirs(self.labels_dir, exist_ok=True)
+        self.roots = label_roots(directories)
+        self.progress_path = os.path.join(output_dir, 'progress.txt')
+        detections_path = os.path.join(output_dir, 'detections.log')
+        diff_path = os.path.join(output_dir, 'diff.csv')
+        self.done, sizes = self._load_progress()
+        if sizes is not None:
+            # Drop the rows of a batch that was interrupted before its progress record
+            for path, size in zip((detections_path, diff_path), sizes):
+                if os.path.exists(path) and os.path.getsize(path) > size:
+                    with open(path, 'r+') as f:
+                        f.truncate(size)
+
+        self._detections = self._open_csv(detections_path, "Timestamp,Class,Confidence,Image Path\n")
+        self._diff = self._open_csv(diff_path, "Image Path,Previous,New,Added,Removed,New vvel\n")
+        self._progress = open(self.progress_path, 'a')
+        self.stats = {'images': 0, 'changed': 0, 'new_vvel': 0}
+
+    def label_path(self, image_path):
+        """Return labels/<input directory name>/<path relative to it>.txt for an image.
+
+        Mirroring the input tree keeps frames with the same file name in different
+        directories from overwriting each other's labels.
+        """
+        image_path = os.path.abspath(image_path)
+        for root, name in self.roots:
+            relative = os.path.relpath(image_path, root)
+            if not relative.startswith(os.pardir + os.sep):
+                return os.path.join(self.labels_dir, name, f"{os.path.splitext(relative)[0]}.txt")
+        return os.path.join(self.labels_dir, f"{os.path.splitext(os.path.basename(image_path))[0]}.txt")
+
+    def _load_progress(self):
+        """Return (finished image paths, [detections.log size, diff.csv size] after the last batch).
+
+        Every batch in progress.txt ends with a '# <size> <size>' line; paths after the last
+        one belong to an unfinished batch. Files without these lines (older runs) count every
+        path as done and return None for the sizes.
+        """
+        if not os.path.exists(self.progress_path):
+            return set(), None
+        done, pending, sizes = set(), [], None
+        with open(self.progress_path, 'r') as f:
+            for line in f:
+                line = line.rstrip('\n')
+                if line.startswith('# '):
+                    done.update(pending)
+                    pending = []
+                    sizes = [int(value) for value in line[2:].split()]
+                elif line:
+                    pending.append(line)
+        if sizes is None:
+            done.update(pending)
+        return done, sizes
+
+    @staticmethod
+    def _open_csv(path, header):
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        f = open(path, 'a')
+        if not exists:
+            f.write(header)
+        return f
+
+    def write(self, image_path, img_shape, boxes, conf_threshold):
+        """Write the outputs for one re-analysed image."""
+        height, width = img_shape[:2]
+        label_path = self.label_path(image_path)
+        os.makedirs(os.path.dirname(label_path), exist_ok=True)
+        with open(label_path, 'w') as f:
+            f.writelines(format_yolo_labels([box[:4] for box in boxes], [box[5] for box in boxes],
+                                            width, height))
+
+        class_name, confidence = summarize(boxes, self.class_names, conf_threshold)
+        if class_name != 'no_detection':
+            self._detections.write(f"{file_timestamp(image_path)},{class_name},{confidence:.2f},{image_path}\n")
+
+        new_ids = {int(box[5]) for box in boxes}
+        old_ids, old_class = previous_classes(image_path)
+        if old_ids is None:
+            # Archived images only carry their primary class in the file name
+            old_ids = {self.class_names.index(old_class)} if old_class in self.class_names else set()
+            new_ids = {self.class_names.index(class_name)} if class_name != 'no_detection' else set()
+        added = sorted(self.class_names[i] for i in new_ids - old_ids)
+        removed = sorted(self.class_names[i] for i in old_ids - new_ids)
+        new_vvel = 'vvel' in added
+        if added or removed:
+            self.stats['changed'] += 1
+            self._diff.write(
+                f"{image_path},{' '.join(sorted(self.class_names[i] for i in old_ids))},"
+                f"{' '.join(sorted(self.class_names[i] for i in new_ids))},"
+                f"{' '.join(added)},{' '.join(removed)},{int(new_vvel)}\n")
+        self.stats['new_vvel'] += int(new_vvel)
+        self.stats['images'] += 1
+
+    def mark_done(self, image_paths):
+        """Flush all outputs and record a finished batch, with the CSV sizes, in the progress file."""
+        for f in (self._detections, self._diff):
+            f.flush()
+            os.fsync(f.fileno())
+        self._progress.write(''.join(f"{path}\n" for path in image_paths)
+                             + f"# {self._detections.tell()} {self._diff.tell()}\n")
+        self._progress.flush()
+        os.fsync(self._progress.fileno())
+        self.done.update(image_paths)
+
+    def close(self):
+        for f in (self._detections, self._diff, self._progress):
+            f.close()
+
+
+def reanalyse(directories, output_dir, model_path, class_names, conf_threshold,
+              imgsz=640, batch_size=8, workers=2, min_side=1080):
+    """Re-run a model over archived images and write labels, log and diff.
+
+    Returns:
+        dict: Number of images processed and changed, and newly found vvel frames
+    """
+    writer = ReanalysisWriter(output_dir, class_names, directories)
+    model = YOLO(model_path, task='detect')
+    todo = (path for path in iter_images(directories) if path not in writer.done)
+    if writer.done:
+        logger.info(f"Resuming re-analysis, {len(writer.done)} images already done")
+
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            decoded = prefetch(executor, todo, min_side, depth=batch_size * 2)
+            for batch in batched(decoded, batch_size):
+                for path, img in batch:
+                    if img is None:
+                        logger.error(f"Failed to decode {path}")
+                valid = [(path, img) for path, img in batch if img is not None]
+                if valid:
+                    results = model([img for _, img in valid], imgsz=imgsz, verbose=False)
+                    for (path, img), result in zip(valid, results):
+                        writer.write(path, img.shape, result.boxes.data.tolist(), conf_threshold)
+                writer.mark_done([path for path, _ in batch])
+
+                if writer.stats['images'] % (batch_size * 25) < batch_size:
+                    rate = writer.stats['images'] / (time.perf_counter() - start)
+                    logger.info(f"Re-analysed {writer.stats['images']} images ({rate:.1f}/s), "
+                                f"{writer.stats['changed']} changed, {writer.stats['new_vvel']} new vvel")
+    finally:
+        writer.close()
+    return writer.stats
+
+
+def main():
+    """Command line entry point for batch re-analysis."""
+    config = load_config()
+
+    parser = argparse.ArgumentParser(description="Re-run a model over archived vespCV images.")
+    parser.add_argument('directories', nargs='+', help="Directories with archived images")
+    parser.add_argument('--output', default=os.path.join('data', 'reanalysis'), help="Output directory")
+    parser.add_argument('--model', default=config['model_path'], help="Model to run (default: model_path from config)")
+    parser.add_argument('--conf', type=float, default=config['conf_threshold'], help="Confidence threshold for the log and diff")
+    parser.add_argument('--imgsz', type=int, default=640, help="Inference image size")
+    parser.add_argument('--batch', type=int, default=8, help="Images per model batch")
+    parser.add_argument('--workers', type=int, default=max((os.cpu_count() or 2) - 1, 1), help="Decoder processes")
+    parser.add_argument('--min-side', type=int, default=1080,
+                        help="Decode JPEGs at reduced scale while the short side stays above this (0 = full size)")
+    args = parser.parse_args()
+
+    stats = reanalyse(args.directories, args.output, args.model, config['class_names'], args.conf,
+                      args.imgsz, args.batch, args.workers, args.min_side)
+    print(f"Re-analysed {stats['images']} images: {stats['changed']} with changed labels, "
+          f"{stats['new_vvel']} with a newly found vvel. See {os.path.join(args.output, 'diff.csv')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Vectorized bounding box helpers working on numpy arrays of xyxy boxes.
+"""
+
+import numpy as np
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Compute the pairwise IoU between two sets of xyxy boxes.
+
+    Args:
+        boxes_a: (N, 4) array of boxes
+        boxes_b: (M, 4) array of boxes
+
+    Returns:
+        np.ndarray: (N, M) float32 array of IoU values
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+
+    # Intersection corners via broadcasting (N, 1) against (1, M)
+    x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0).astype(np.float32)
+
+
+def nms(boxes, scores, iou_threshold, classes=None):
+    """Greedy non-maximum suppression.
+
+    Args:
+        boxes: (N, 4) array of xyxy boxes
+        scores: (N,) array of confidences
+        iou_threshold: Boxes overlapping a kept box by more than this are dropped
+        classes: Optional (N,) class ids; when given, boxes only suppress boxes of the same class
+
+    Returns:
+        np.ndarray: Indices of the kept boxes, highest score first
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    if classes is not None:
+        # Shift each class into its own coordinate range so classes never overlap
+        offsets = np.asarray(classes, dtype=np.float32).reshape(-1, 1) * (boxes.max() + 1)
+        boxes = boxes + offsets
+
+    order = np.argsort(-scores)
+    overlaps = iou_matrix(boxes[order], boxes[order])
+    suppressed = np.zeros(len(order), dtype=bool)
+    keep = []
+    for i in range(len(order)):
+        if suppressed[i]:
+            continue
+        keep.append(order[i])
+        suppressed |= overlaps[i] > iou_threshold
+    return np.asarray(keep, dtype=np.int64)
+
+
+def expand_boxes(boxes, padding, min_size, image_width, image_height):
+    """Grow boxes around their centre and clip them to the image.
+
+    Args:
+        boxes: (N, 4) array of xyxy boxes
+        padding: Fraction of the box size added on every side
+        min_size: Minimum width and height of the expanded box in pixels
+        image_width: Image width used for clipping
+        image_height: Image height used for clipping
+
+    Returns:
+        np.ndarray: (N, 4) int32 array of expanded boxes
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    centres = (boxes[:, :2] + boxes[:, 2:]) / 2
+    sizes = np.maximum((boxes[:, 2:] - boxes[:, :2]) * (1 + 2 * padding), min_size)
+    sizes = np.minimum(sizes, [image_width, image_height])
+
+    # Shift boxes that cross the border back inside instead of shrinking them
+    top_left = np.clip(centres - sizes / 2, 0, [image_width, image_height] - sizes)
+    return np.concatenate([top_left, top_left + sizes], axis=1).round().astype(np.int32)
@@ -0,0 +1,241 @@
+"""
+Build a YOLO training dataset from the collected image/label pairs.
+
+Streams over the frames saved by save_original_image (data/yolo_jpg_txt) and
+assigns every frame to train, valid or test by hashing its file name, so a
+frame keeps its split when new data arrives. The hash is salted per stratum
+(the rarest class in the frame), which spreads every class over the three
+splits. Images are copied or, with --imgsz, resized to training resolution
+in a process pool. A manifest records what was built, so re-running only
+processes new or changed files. The output matches config/data.yaml:
+
+    <output>/train/images, <output>/train/labels, valid/..., test/..., data.yaml
+
+Usage:
+    python -m src.utils.build_dataset --output data/dataset --imgsz 1280
+"""
+
+import os
+import shutil
+import hashlib
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import yaml
+
+from src.core.config_loader import load_config
+from src.utils.detection_utils import read_yolo_labels
+
+SPLITS = ('train', 'valid', 'test')
+
+
+def source_names(directories):
+    """Return a name per source directory: its base name, with a suffix when two sources share it."""
+    names = []
+    for directory in directories:
+        base = os.path.basename(os.path.abspath(directory)) or 'root'
+        name, suffix = base, 2
+        while name in names:
+            name = f"{base}_{suffix}"
+            suffix += 1
+        names.append(name)
+    return names
+
+
+def iter_pairs(directories, include_negatives=False):
+    """Yield (key, dataset file name, image path, label path or None) for the collected frames, in a stable order.
+
+    The key '<source name>/<file name>' identifies a frame in the manifest. Frames
+    of the first source keep their file name in the dataset, those of other
+    sources get the source name as prefix, so equal names never overwrite each other.
+    """
+    for index, (directory, source) in enumerate(zip(directories, source_names(directories))):
+        for name in sorted(os.listdir(directory)):
+            if not name.lower().endswith('.jpg') or name.startswith('_'):
+                continue  # '_' files are overwritten working copies of frames without detections
+            image_path = os.path.join(directory, name)
+            label_path = os.path.splitext(image_path)[0] + '.txt'
+            if not os.path.exists(label_path):
+                if not include_negatives:
+                    continue
+                label_path = None
+            yield f"{source}/{name}", name if index == 0 else f"{source}_{name}", image_path, label_path
+
+
+def stratum(label_path, class_counts):
+    """Return the stratum of a frame: its rarest labelled class, or -1 for a negative frame."""
+    class_ids = {label[0] for label in read_yolo_labels(label_path)} if label_path else set()
+    if not class_ids:
+        return -1
+    return min(class_ids, key=lambda class_id: (class_counts.get(class_id, 0), class_id))
+
+
+def assign_split(name, stratum_id, fractions, salt=''):
+    """Map a file name to a split with a stable hash.
+
+    Args:
+        name: Image file name
+        stratum_id: Stratum of the frame
+        fractions: (train, valid, test) fractions summing to 1
+        salt: Changes every assignment; keep it fixed for stable splits
+
+    Returns:
+        str: One of SPLITS
+    """
+    digest = hashlib.sha1(f"{salt}:{stratum_id}:{name}".encode()).digest()
+    position = int.from_bytes(digest[:8], 'big') / 2**64
+    cumulative = 0.0
+    for split, fraction in zip(SPLITS, fractions):
+        cumulative += fraction
+        if position < cumulative:
+            return split
+    return SPLITS[-1]
+
+
+def export_image(source, target, imgsz):
+    """Copy an image, or resize its long side to imgsz. Runs in a worker process."""
+    if not imgsz:
+        shutil.copyfile(source, target)
+        return target
+    img = cv2.imread(source)
+    if img is None:
+        raise ValueError(f"Cannot read {source}")
+    height, width = img.shape[:2]
+    scale = imgsz / max(height, width)
+    if scale < 1:
+        img = cv2.resize(img, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+    cv2.imwrite(target, img, [cv2.IMWRITE_JPEG_QUALITY, 95])
+    return target
+
+
+def source_signature(image_path, label_path):
+    """Return the size and mtime of an image and its label, so a changed label is exported again."""
+    parts = []
+    for path in (image_path, label_path):
+        if path is None:
+            parts.append('-')
+            continue
+        stat = os.stat(path)
+        parts.append(f"{stat.st_size}:{int(stat.st_mtime)}")
+    return ':'.join(parts)
+
+
+def load_manifest(path):
+    """Return {frame key: (split, source signature)} of earlier runs."""
+    manifest = {}
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            for line in f:
+                name, split, signature = line.rstrip('\n').rsplit(',', 2)
+                manifest[name] = (split, signature)
+    return manifest
+
+
+def build_dataset(directories, output_dir, class_names, fractions=(0.8, 0.1, 0.1), imgsz=None,
+                  workers=2, include_negatives=False, salt=''):
+    """Build or update the dataset.
+
+    Returns:
+        dict: Counts of new, unchanged and failed images and images per split and class
+    """
+    for split in SPLITS:
+        for kind in ('images', 'labels'):
+            os.makedirs(os.path.join(output_dir, split, kind), exist_ok=True)
+
+    pairs = list(iter_pairs(directories, include_negatives))
+    # Class frequencies decide which class is the rarest in a frame
+    class_counts = Counter(label[0] for _, _, _, label_path in pairs if label_path
+                           for label in read_yolo_labels(label_path))
+
+    manifest_path = os.path.join(output_dir, 'manifest.csv')
+    manifest = load_manifest(manifest_path)
+    stats = {'new': 0, 'unchanged': 0, 'failed': 0,
+             'splits': {split: Counter() for split in SPLITS}}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor, open(manifest_path, 'a') as manifest_file:
+        pending = []
+        for key, name, image_path, label_path in pairs:
+            signature = source_signature(image_path, label_path)
+            labels = read_yolo_labels(label_path) if label_path else []
+            # Manifests of older versions are keyed by the file name of the first source
+            previous = manifest.get(key) or manifest.get(name)
+
+            if previous and previous[1] == signature:
+                split = previous[0]
+                stats['unchanged'] += 1
+            else:
+                # Once assigned, a frame keeps its split even if class frequencies change later
+                split = previous[0] if previous else \
+                    assign_split(name, stratum(label_path, class_counts), fractions, salt)
+                target = os.path.join(output_dir, split, 'images', name)
+                pending.append((key, name, split, signature, label_path,
+                                executor.submit(export_image, image_path, target, imgsz)))
+            for class_id in {label[0] for label in labels} or {-1}:
+                stats['splits'][split][class_names[class_id] if class_id >= 0 else 'negative'] += 1
+
+        for key, name, split, signature, label_path, future in pending:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Failed to export {name}: {e}")
+                stats['failed'] += 1
+                continue
+            label_target = os.path.join(output_dir, split, 'labels', os.path.splitext(name)[0] + '.txt')
+            if label_path:
+                shutil.copyfile(label_path, label_target)
+            else:
+                open(label_target, 'w').close()
+            manifest_file.write(f"{key},{split},{signature}\n")
+            stats['new'] += 1
+
+    write_data_yaml(output_dir, class_names)
+    return stats
+
+
+def write_data_yaml(output_dir, class_names):
+    """Write data.yaml for ultralytics next to the splits."""
+    data = {
+        'path': os.path.abspath(output_dir),
+        'train': 'train/images',
+        'val': 'valid/images',
+        'test': 'test/images',
+        'nc': len(class_names),
+        'names': list(class_names),
+    }
+    with open(os.path.join(output_dir, 'data.yaml'), 'w') as f:
+        yaml.safe_dump(data, f, sort_keys=False)
+
+
+def main():
+    """Command line entry point for the dataset builder."""
+    config = load_config()
+
+    parser = argparse.ArgumentParser(description="Build train/valid/test splits from collected vespCV frames.")
+    parser.add_argument('--source', nargs='+', default=[os.path.join('data', 'yolo_jpg_txt')],
+                        help="Directories with image/.txt pairs")
+    parser.add_argument('--output', default=os.path.join('data', 'dataset'), help="Dataset directory")
+    parser.add_argument('--split', nargs=3, type=float, default=[0.8, 0.1, 0.1], metavar=('TRAIN', 'VALID', 'TEST'),
+                        help="Split fractions")
+    parser.add_argument('--imgsz', type=int, help="Resize the long side to this size (default: copy as is)")
+    parser.add_argument('--workers', type=int, default=max((os.cpu_count() or 2) - 1, 1), help="Worker processes")
+    parser.add_argument('--include-negatives', action='store_true', help="Also add frames without labels")
+    parser.add_argument('--salt', default='', help="Hash salt; changing it reshuffles all splits")
+    args = parser.parse_args()
+
+    total = sum(args.split)
+    fractions = tuple(fraction / total for fraction in args.split)
+    stats = build_dataset(args.source, args.output, config['class_names'], fractions, args.imgsz,
+                          args.workers, args.include_negatives, args.salt)
+
+    print(f"{stats['new']} new, {stats['unchanged']} unchanged, {stats['failed']} failed")
+    names = config['class_names'] + ['negative']
+    print(f"{'split':<8}" + ''.join(f"{name:>10}" for name in names))
+    for split in SPLITS:
+        print(f"{split:<8}" + ''.join(f"{stats['splits'][split][name]:>10}" for name in names))
+    print(f"Dataset written to {args.output}; train with data={os.path.join(args.output, 'data.yaml')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,61 @@ Utility functions for image capture and detection.
 """
 
 import os
+import glob
+import shutil
 import subprocess
 import cv2
-from src.core.logger import logger
+from src.core.logger import logger, EventLog
 from src.core.config_loader import load_config
+from src.core.postprocess import draw_detections
+from src.utils.frame_pool import frame_pool
 import time
 import json
 
+def format_yolo_labels(boxes, class_ids, img_width, img_height):
+    """Convert pixel xyxy boxes to YOLO label lines.
+
+    Args:
+        boxes: Sequence of (x1, y1, x2, y2) boxes in pixels
+        class_ids: Sequence of class ids, one per box
+        img_width: Image width used for normalization
+        img_height: Image height used for normalization
+
+    Returns:
+        list: Lines "class_id x_center y_center width height" with normalized values
+    """
+    lines = []
+    for (x1, y1, x2, y2), class_id in zip(boxes, class_ids):
+        # Convert to YOLO format (normalized)
+        x_center = (x1 + x2) / (2 * img_width)
+        y_center = (y1 + y2) / (2 * img_height)
+        width = (x2 - x1) / img_width
+        height = (y2 - y1) / img_height
+        lines.append(f"{int(class_id)} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n")
+    return lines
+
+def read_yolo_labels(txt_path):
+    """Read a YOLO label file.
+
+    Args:
+        txt_path: Path to the .txt label file
+
+    Returns:
+        list: (class_id, x_center, y_center, width, height) tuples; empty if the file is missing
+    """
+    labels = []
+    if not os.path.exists(txt_path):
+        return labels
+    with open(txt_path, 'r') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 5:
+                labels.append((int(parts[0]), *map(float, parts[1:5])))
+    return labels
+
+# Buffered detections.log writer; lines reach the file within logging.event_flush_interval seconds
+detection_log = EventLog(os.path.join('data', 'logs', 'detections.log'), "Timestamp,Class,Confidence,Image Path")
+
 def log_detection_data(detections, image_path):
     """Log detection data to a detections.log file in CSV format.
     
@@ -22,34 +70,58 @@ def log_detection_data(detections, image_path):
         if detections.get('class') == 'no_detection':
             return
             
-        # Create logs directory if it doesn't exist
-        logs_dir = os.path.join('data', 'logs')
-        os.makedirs(logs_dir, exist_ok=True)
-        
         # Prepare log entry
         timestamp = detections.get('timestamp', time.strftime("%Y%m%d-%H%M%S"))
         class_name = detections.get('class', 'no_detection')
         confidence = detections.get('confidence', '0.00')
         
-        # Write to log file
-        log_path = os.path.join(logs_dir, 'detections.log')
-        
-        # Check if file exists to write header
-        file_exists = os.path.exists(log_path)
-        
-        with open(log_path, 'a') as f:
-            # Write header if file is new
-            if not file_exists:
-                f.write("Timestamp,Class,Confidence,Image Path\n")
-            
-            # Write data row
-            f.write(f"{timestamp},{class_name},{confidence},{image_path}\n")
-            
-        logger.debug(f"Detection data logged to {log_path}")
+        # Queue the data row; the event log writes it in the background
+        detection_log.write(f"{timestamp},{class_name},{confidence},{image_path}")
         
     except Exception as e:
         logger.error(f"Error logging detection data: {e}")
 
+def read_recent_detections(since, log_path=None, block_size=65536):
+    """Return the detections logged at or after a time, oldest first.
+
+    detections.log is read backwards in blocks from its end and reading stops
+    at the first older line, so the cost depends on the window, not on the
+    size of the log.
+
+    Args:
+        since: Epoch seconds of the window start
+        log_path: Detections log (default: data/logs/detections.log)
+        block_size: Bytes read per step
+
+    Returns:
+        list: (timestamp string, class name) tuples
+    """
+    log_path = log_path or detection_log.path
+    detection_log.flush()
+    if not os.path.exists(log_path):
+        return []
+    # Timestamps are %Y%m%d-%H%M%S strings, which sort like the times they represent
+    since_text = time.strftime("%Y%m%d-%H%M%S", time.localtime(since))
+    entries = []
+    with open(log_path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        remainder = b''
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            lines = (f.read(size) + remainder).split(b'\n')
+            # The first line may continue in the previous block, unless this is the start of the file
+            remainder = lines.pop(0) if position > 0 else b''
+            for line in reversed(lines):
+                fields = line.decode('utf-8', errors='replace').split(',', 3)
+                if len(fields) < 2 or not fields[0][:8].isdigit():
+                    continue  # Empty line or header
+                if fields[0] < since_text:
+                    return entries[::-1]
+                entries.append((fields[0], fields[1]))
+    return entries[::-1]
+
 def capture_image():
     """Capture an image using libcamera-still and save it to the configured path.
     
@@ -94,60 +166,140 @@ def capture_image():
         logger.error(f"Unexpected error during image capture: {e}")
         raise
 
-def save_annotated_image(image, results, config):
-    """Save the annotated image.
-    
+def capture_burst(count, interval, width, height):
+    """Capture a burst of images with a single libcamera-still timelapse run.
+
+    Keeping the camera open for the whole burst avoids the start-up delay of a
+    separate libcamera-still call per frame.
+
     Args:
-        image: The image to annotate
-        results: The detection results
+        count: Number of frames to capture
+        interval: Seconds between frames (at least 1, so frames get distinct timestamps)
+        width: Frame width in pixels
+        height: Frame height in pixels
+
+    Returns:
+        list: Paths of the captured images, oldest first
+
+    Raises:
+        subprocess.SubprocessError: If the camera capture fails
+    """
+    try:
+        config = load_config()
+        images_folder = config.get('images_folder')
+        os.makedirs(images_folder, exist_ok=True)
+
+        # Remove frames of the previous burst
+        for old_path in glob.glob(os.path.join(images_folder, 'burst_*.jpg')):
+            os.remove(old_path)
+
+        interval_ms = int(max(interval, 1) * 1000)
+        pattern = os.path.join(images_folder, 'burst_%04d.jpg')
+        logger.debug(f"Capturing burst of {count} images to: {pattern}")
+
+        subprocess.run([
+            "libcamera-still",
+            "--nopreview",
+            "-o", pattern,
+            "--width", str(width),
+            "--height", str(height),
+            "--timelapse", str(interval_ms),
+            "-t", str(interval_ms * count)
+        ], check=True)
+
+        image_paths = sorted(glob.glob(os.path.join(images_folder, 'burst_*.jpg')))
+        logger.debug(f"Burst captured {len(image_paths)} images")
+        return image_paths
+
+    except subprocess.SubprocessError as e:
+        logger.error(f"Failed to capture burst: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error during burst capture: {e}")
+        raise
+
+def render_annotated_preview(image, detections, config):
+    """Return a downscaled, annotated preview of the frame as JPEG bytes.
+
+    The frame is resized to annotation.preview_size (long side) into a pooled
+    buffer and the boxes are drawn on the preview, so no full-resolution copy
+    is made. The preview is encoded once per frame and shared by the GUI file
+    and the web dashboard.
+
+    Args:
+        image: The full-resolution frame (not modified)
+        detections: Structured detection array from the post-processing stage
         config: Configuration dictionary
-        
+
+    Returns:
+        bytes: JPEG data, or None on failure
+    """
+    try:
+        annotation_config = config.get('annotation', {})
+        height, width = image.shape[:2]
+        scale = min(annotation_config.get('preview_size', 1280) / max(height, width), 1.0)
+        size = (round(width * scale), round(height * scale))
+        with frame_pool.borrow((size[1], size[0], 3)) as preview:
+            cv2.resize(image, size, dst=preview, interpolation=cv2.INTER_AREA)
+            draw_detections(preview, detections, config['class_names'],
+                            annotation_config.get('min_confidence', 0.0), box_scale=scale)
+            ok, encoded = cv2.imencode('.jpg', preview)
+        return encoded.tobytes() if ok else None
+
+    except Exception as e:
+        logger.error(f"Error rendering preview: {e}")
+        return None
+
+def save_annotated_image(image, detections, config, preview_jpeg=None):
+    """Save a downscaled, annotated preview of the frame for the GUI.
+
+    Args:
+        image: The full-resolution frame (not modified)
+        detections: Structured detection array from the post-processing stage
+        config: Configuration dictionary
+        preview_jpeg: Preview already encoded by render_annotated_preview (optional)
+
     Returns:
         str: Path to the saved annotated image
     """
     try:
-        if results:
-            # Create and save the annotated version
-            annotated_image = image.copy()
-            class_names = results.names
-
-            if results.boxes:
-                for box in results.boxes:
-                    # Get coordinates as a list of floats
-                    coords = box.xyxy[0].tolist()
-                    # Convert coordinates to integers
-                    x1, y1, x2, y2 = int(coords[0]), int(coords[1]), int(coords[2]), int(coords[3])
-
-                    class_id = int(box.cls[0])
-                    class_name = class_names[class_id]
-
-                    # Draw bounding box
-                    cv2.rectangle(annotated_image, (x1, y1), (x2, y2), (0, 255, 0), 10)
-                    label = f'{class_name} {box.conf[0]:.2f}'
-                    
-                    # Draw label
-                    text_y = y1 - 10 if y1 - 10 > 10 else y1 + 10
-                    cv2.putText(annotated_image, label, (x1, int(text_y)), 
-                              cv2.FONT_HERSHEY_SIMPLEX, 15.0, (0, 255, 0), 15)
-
-            # Save the annotated image with the consistent name
-            output_path = os.path.join(config.get('images_folder'), 'image_after_inference.jpg')
-            cv2.imwrite(output_path, annotated_image)
-            logger.debug(f"Annotated image saved to {output_path}")
-
-            return output_path
+        if preview_jpeg is None:
+            preview_jpeg = render_annotated_preview(image, detections, config)
+        if preview_jpeg is None:
+            return None
+        output_path = os.path.join(config.get('images_folder'), 'image_after_inference.jpg')
+
+        # Save the annotated image with the consistent name
+        with open(output_path, 'wb') as f:
+            f.write(preview_jpeg)
+        logger.debug(f"Annotated image saved to {output_path}")
+        return output_path
 
     except Exception as e:
         logger.error(f"Error saving images: {e}")
         return None
 
-def save_original_image(config, detections=None, results=None):
+def detection_file_stem(detections):
+    """Return the class-confidence-date-time file name (without extension) of a detection.
+
+    Burst frames can share a second, so they get their index in the burst as a
+    -b<index> suffix; readers of the name only use the first four fields.
+    """
+    stem = f"{detections['class']}-{detections['confidence']}-{detections['timestamp']}"
+    if detections.get("burst_index") is not None:
+        stem += f"-b{detections['burst_index']}"
+    return stem
+
+def save_original_image(config, detections=None, results=None, image_path=None, keep_name=False):
     """Save the original image with detection metadata in the filename and create a YOLO format text file.
     
     Args:
         config: Configuration dictionary
         detections: Dictionary containing detection information (optional)
         results: YOLO detection results containing bounding boxes (optional)
+        image_path: Captured image to save (optional, defaults to image_for_detection.jpg)
+        keep_name: Name the file after the detection metadata even without a detection,
+            for frames kept by the active-learning sampler
         
     Returns:
         str: Path to the saved original image
@@ -159,7 +311,7 @@ def save_original_image(config, detections=None, results=None):
         
         # Load configuration
         images_folder = config.get('images_folder')
-        original_image_path = os.path.join(images_folder, 'image_for_detection.jpg')
+        original_image_path = image_path or os.path.join(images_folder, 'image_for_detection.jpg')
         
         # Check if the original image exists
         if not os.path.exists(original_image_path):
@@ -167,18 +319,15 @@ def save_original_image(config, detections=None, results=None):
             return None
         
         # If we have detection metadata, use it for the filename
-        if detections and detections.get("should_archive"):
-            class_name = detections["class"]
-            confidence = detections["confidence"]
-            timestamp = detections["timestamp"]
-            base_filename = f"{class_name}-{confidence}-{timestamp}"
+        if detections and (detections.get("should_archive") or keep_name):
+            base_filename = detection_file_stem(detections)
         else:
             # Fallback to the old behavior if no detection metadata
             base_filename = f"_{os.path.basename(original_image_path)}"
             
-        # Save the image
+        # Copy the captured JPEG as is, without decoding and re-encoding it
         new_image_path = os.path.join(yolo_dir, f"{base_filename}.jpg")
-        cv2.imwrite(new_image_path, cv2.imread(original_image_path))
+        shutil.copyfile(original_image_path, new_image_path)
         logger.debug(f"Original image saved to {new_image_path}")
         
         # Log detection data
@@ -188,26 +337,15 @@ def save_original_image(config, detections=None, results=None):
         # If we have YOLO results, create the YOLO format text file
         if results and results.boxes:
             # Get the image dimensions for normalization
-            img = cv2.imread(original_image_path)
-            img_height, img_width = img.shape[:2]
+            img_height, img_width = results.orig_shape
             
             # Create the text file with the same base name
             txt_path = os.path.join(yolo_dir, f"{base_filename}.txt")
             
+            data = results.boxes.data.tolist()
             with open(txt_path, 'w') as f:
-                for box in results.boxes:
-                    # Get normalized coordinates (x_center, y_center, width, height)
-                    x1, y1, x2, y2 = box.xyxy[0].tolist()
-                    class_id = int(box.cls[0])
-                    
-                    # Convert to YOLO format (normalized)
-                    x_center = (x1 + x2) / (2 * img_width)
-                    y_center = (y1 + y2) / (2 * img_height)
-                    width = (x2 - x1) / img_width
-                    height = (y2 - y1) / img_height
-                    
-                    # Write in YOLO format: class_id x_center y_center width height
-                    f.write(f"{class_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n")
+                f.writelines(format_yolo_labels([row[:4] for row in data], [row[-1] for row in data],
+                                                img_width, img_height))
             
             logger.debug(f"YOLO format text file saved to {txt_path}")
         
@@ -230,10 +368,7 @@ def save_archived_image(image, detections, config):
     """
     try:
         if detections.get("should_archive"):
-            class_name = detections["class"]
-            confidence = detections["confidence"]
-            timestamp = detections["timestamp"]
-            archive_filename = f"{class_name}-{confidence}-{timestamp}.jpg"
+            archive_filename = f"{detection_file_stem(detections)}.jpg"
             archive_path = os.path.join(config['images_folder'], archive_filename)
             cv2.imwrite(archive_path, image)
             logger.debug(f"Archived detection image: {archive_path}")
@@ -243,33 +378,6 @@ def save_archived_image(image, detections, config):
         logger.error(f"Error saving archived image: {e}")
         return None
 
-def initialize_application():
-    """Initialize all core components of the application."""
-    try:
-        # Load configuration
-        config = load_config()
-        
-        # Create necessary directories first, before any logging
-        required_dirs = [
-            os.path.dirname(config['log_file_path']),  # Create logs directory
-            config['images_folder'],                   # Create images directory
-            'data/yolo_jpg_txt'                       # Create yolo directory
-        ]
-        
-        for dir_path in required_dirs:
-            os.makedirs(dir_path, exist_ok=True)
-            print(f"Created directory: {dir_path}")  # Use print instead of logger since logger isn't configured yet
-        
-        # Now that directories exist, configure logging
-        configure_logger(config['log_file_path'])
-        start_temperature_logging()
-        
-        logger.info("Application initialized successfully")
-        return config
-    except Exception as e:
-        print(f"Failed to initialize application: {e}")  # Use print instead of logger
-        raise
-
 if __name__ == "__main__":
     # Test image capture
     try:
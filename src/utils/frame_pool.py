@@ -0,0 +1,80 @@
+"""
+Reusable frame buffers for the vespCV detection pipeline.
+
+Every cycle used to allocate fresh multi-megabyte arrays for the same few
+image shapes (screener input, GUI preview, ...). On a 2-4 GB Raspberry Pi
+this fragments the heap and makes RSS spike. The pool keeps released arrays
+per (shape, dtype) and hands them out again, so a steady-state cycle
+allocates no new image buffers.
+"""
+
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from src.core.metrics import metrics
+
+
+class FramePool:
+    def __init__(self, max_free_per_shape=2):
+        """Initialize an empty pool.
+
+        Args:
+            max_free_per_shape: Released arrays kept per (shape, dtype); extra ones are dropped
+        """
+        self.max_free_per_shape = max_free_per_shape
+        self._lock = threading.Lock()
+        self._free = {}
+        self.allocations = 0
+        self.reuses = 0
+        self.pooled_bytes = 0
+
+    def acquire(self, shape, dtype=np.uint8):
+        """Return an uninitialized array of the given shape, reusing a released one if possible."""
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                self.reuses += 1
+                self.pooled_bytes -= free[-1].nbytes
+                return free.pop()
+            self.allocations += 1
+        return np.empty(shape, dtype=dtype)
+
+    def release(self, array):
+        """Give an array back to the pool."""
+        key = (array.shape, array.dtype.str)
+        with self._lock:
+            free = self._free.setdefault(key, [])
+            if len(free) < self.max_free_per_shape:
+                free.append(array)
+                self.pooled_bytes += array.nbytes
+            metrics.set_gauge('frame_pool_bytes', self.pooled_bytes)
+
+    @contextmanager
+    def borrow(self, shape, dtype=np.uint8):
+        """Acquire an array for the duration of a with block.
+
+        Example:
+            with frame_pool.borrow((960, 1280, 3)) as preview:
+                cv2.resize(img, (1280, 960), dst=preview)
+        """
+        array = self.acquire(shape, dtype)
+        try:
+            yield array
+        finally:
+            self.release(array)
+
+    def get_stats(self):
+        """Return allocation and reuse counts and the bytes held by free buffers."""
+        with self._lock:
+            return {
+                'allocations': self.allocations,
+                'reuses': self.reuses,
+                'pooled_bytes': self.pooled_bytes,
+            }
+
+
+# Process-wide pool used by the detector stages
+frame_pool = FramePool()
@@ -50,6 +50,9 @@ class ImageHandler:
                 # Calculate new dimensions
                 new_width = int(img_width * scale_factor)
                 new_height = int(img_height * scale_factor)
+
+                # Let the JPEG decoder scale down by up to 8x instead of decoding the full frame
+                img.draft('RGB', (new_width, new_height))
                 
                 # Resize image using LANCZOS resampling for better quality
                 img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
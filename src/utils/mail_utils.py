@@ -83,4 +83,33 @@ def prepare_and_send_detection_email(timestamp, confidence, annotated_image_path
         
     except Exception as e:
         logger.error(f"Failed to prepare and send detection email: {e}")
-        return False
\ No newline at end of file
+        return False
+
+class AlertMailer:
+    """Sends one warning email for the first confirmed detection while armed.
+
+    handle() is meant to run as a 'mail' event bus subscriber for DetectionConfirmed
+    events, so a slow mail server never blocks the GUI or the detection loop.
+    """
+
+    def __init__(self, enabled=False, on_sent=None):
+        """
+        Args:
+            enabled: Whether the alert is armed
+            on_sent: Optional function called (in the subscriber thread) after the email was sent
+        """
+        self.enabled = enabled
+        self.sent = False
+        self.on_sent = on_sent
+
+    def handle(self, event):
+        """Send the email for a DetectionConfirmed event if armed and not sent yet."""
+        if not self.enabled or self.sent:
+            return
+        if prepare_and_send_detection_email(event.timestamp, event.confidence,
+                                            event.annotated_path, event.image_path):
+            self.sent = True
+            self.enabled = False
+            logger.info("Warning email sent for vvel detection")
+            if self.on_sent is not None:
+                self.on_sent()
@@ -0,0 +1,124 @@
+"""
+On-demand sampling profiler for the running vespCV application.
+
+Samples the Python stacks of all threads (detection loop, stats thread, Tk
+main loop, ...) for a number of seconds and writes a collapsed-stack file for
+flamegraph tools plus a top-functions summary to data/logs/. Nothing runs
+until a profile is requested, so there is no overhead when idle.
+
+Trigger it on a running detector with:
+    kill -USR1 <pid of src/core/main.py>
+or press Ctrl+P in the GUI.
+"""
+
+import os
+import sys
+import time
+import signal
+import threading
+from collections import Counter
+
+from src.core.logger import logger
+
+
+class SamplingProfiler:
+    def __init__(self, output_dir=os.path.join('data', 'logs'), interval=0.01):
+        """Initialize the profiler.
+
+        Args:
+            output_dir: Directory for the profile files
+            interval: Seconds between stack samples
+        """
+        self.output_dir = output_dir
+        self.interval = interval
+        self._thread = None
+
+    def is_running(self):
+        """Return True while a profile is being recorded."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration=30):
+        """Start sampling for duration seconds in a background thread.
+
+        Returns:
+            bool: False if a profile is already running
+        """
+        if self.is_running():
+            logger.warning("Profiler already running")
+            return False
+        self._thread = threading.Thread(target=self._run, args=(duration,), daemon=True, name="profiler")
+        self._thread.start()
+        logger.info(f"Profiling all threads for {duration}s")
+        return True
+
+    def _run(self, duration):
+        """Collect samples and write the result files."""
+        try:
+            stacks, sample_count = self._sample(duration)
+            folded_path, top_path = self._write(stacks, sample_count)
+            logger.info(f"Profile written to {folded_path} and {top_path}")
+        except Exception as e:
+            logger.error(f"Error while profiling: {e}")
+
+    def _sample(self, duration):
+        """Sample the stacks of all other threads until duration has passed."""
+        own_id = threading.get_ident()
+        stacks = Counter()
+        sample_count = 0
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                stacks[tuple(reversed(stack))] += 1
+            sample_count += 1
+            time.sleep(self.interval)
+        return stacks, sample_count
+
+    def _write(self, stacks, sample_count):
+        """Write the collapsed stacks and the top-functions summary."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"profile-{time.strftime('%Y%m%d-%H%M%S')}")
+
+        # Collapsed-stack format: thread;outer;...;inner count (flamegraph.pl, speedscope)
+        folded_path = f"{base}.folded"
+        with open(folded_path, 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{';'.join(stack)} {count}\n")
+
+        self_counts = Counter()
+        total_counts = Counter()
+        for stack, count in stacks.items():
+            self_counts[stack[-1]] += count
+            for function in set(stack[1:]):
+                total_counts[function] += count
+
+        top_path = f"{base}-top.txt"
+        with open(top_path, 'w') as f:
+            f.write(f"{sample_count} samples every {self.interval * 1000:.0f} ms\n\n")
+            f.write("Top functions by self samples (where threads were executing or waiting)\n")
+            for function, count in self_counts.most_common(25):
+                f.write(f"{count:>8} {100 * count / max(sample_count, 1):>6.1f}%  {function}\n")
+            f.write("\nTop functions by total samples (including callees)\n")
+            for function, count in total_counts.most_common(25):
+                f.write(f"{count:>8} {100 * count / max(sample_count, 1):>6.1f}%  {function}\n")
+        return folded_path, top_path
+
+
+def install_signal_handler(profiler, duration=30, signum=signal.SIGUSR1):
+    """Start a profile of duration seconds whenever the process receives signum.
+
+    Must be called from the main thread.
+    """
+    def handler(received_signum, frame):
+        profiler.start(duration)
+
+    signal.signal(signum, handler)
+    logger.info(f"Send signal {signal.Signals(signum).name} to pid {os.getpid()} to record a {duration}s profile")
@@ -0,0 +1,176 @@
+"""
+INT8 quantization workflow for the vespCV detection model.
+
+Calibrates an INT8 export of the FP32 YOLO weights on the frames collected in
+data/yolo_jpg_txt and reports the accuracy drift against the FP32 model on the
+YOLO .txt labels stored next to those frames.
+
+Usage:
+    python -m src.utils.quantize --format openvino --imgsz 640
+"""
+
+import os
+import json
+import argparse
+import tempfile
+
+import yaml
+from ultralytics import YOLO
+
+from src.core.logger import logger
+from src.core.config_loader import load_config
+
+# Export formats that support INT8 calibration in ultralytics and run well on ARM CPUs
+INT8_FORMATS = ('openvino', 'tflite')
+
+
+def write_calibration_yaml(images_dir, class_names, output_dir):
+    """Write a dataset yaml that points both splits at the collected frames.
+
+    The .txt files written by save_original_image sit next to the .jpg files,
+    which is the layout ultralytics falls back to when the path has no
+    'images' directory.
+
+    Args:
+        images_dir: Directory with the collected image/label pairs
+        class_names: List of class names from the config
+        output_dir: Directory to write the yaml to
+
+    Returns:
+        str: Path to the written yaml file
+    """
+    data = {
+        'path': os.path.abspath(images_dir),
+        'train': '.',
+        'val': '.',
+        'names': {i: name for i, name in enumerate(class_names)},
+    }
+    yaml_path = os.path.join(output_dir, 'calibration.yaml')
+    with open(yaml_path, 'w') as f:
+        yaml.safe_dump(data, f, sort_keys=False)
+    return yaml_path
+
+
+def evaluate_model(model_path, data_yaml, imgsz):
+    """Validate a model on the calibration set and return a metrics summary.
+
+    Args:
+        model_path: Path to the model weights or exported model
+        data_yaml: Dataset yaml created by write_calibration_yaml
+        imgsz: Inference image size
+
+    Returns:
+        dict: mAP50, mAP50-95, precision, recall, per-class AP50 and inference speed
+    """
+    model = YOLO(model_path, task='detect')
+    metrics = model.val(data=data_yaml, imgsz=imgsz, batch=1, split='val', plots=False, verbose=False)
+    box = metrics.box
+    per_class = {
+        metrics.names[int(class_id)]: float(ap50)
+        for class_id, ap50 in zip(box.ap_class_index, box.ap50)
+    }
+    return {
+        'map50': float(box.map50),
+        'map50_95': float(box.map),
+        'precision': float(box.mp),
+        'recall': float(box.mr),
+        'per_class_ap50': per_class,
+        'inference_ms': float(metrics.speed.get('inference', 0.0)),
+    }
+
+
+def compute_drift(fp32_metrics, int8_metrics):
+    """Return the per-metric difference (INT8 minus FP32)."""
+    drift = {
+        key: int8_metrics[key] - fp32_metrics[key]
+        for key in ('map50', 'map50_95', 'precision', 'recall', 'inference_ms')
+    }
+    drift['per_class_ap50'] = {
+        name: int8_metrics['per_class_ap50'].get(name, 0.0) - ap50
+        for name, ap50 in fp32_metrics['per_class_ap50'].items()
+    }
+    return drift
+
+
+def quantize(model_path, images_dir, class_names, work_dir, export_format='openvino', imgsz=640, fraction=1.0):
+    """Export an INT8 model calibrated on the collected frames.
+
+    Args:
+        model_path: Path to the FP32 .pt weights
+        images_dir: Directory with collected image/label pairs used for calibration
+        class_names: List of class names from the config
+        work_dir: Directory for the calibration yaml; the caller removes it
+        export_format: One of INT8_FORMATS
+        imgsz: Export image size (fixed for the exported model)
+        fraction: Fraction of the collected frames to use for calibration
+
+    Returns:
+        tuple: (path to the INT8 artifact, path to the calibration yaml)
+    """
+    if export_format not in INT8_FORMATS:
+        raise ValueError(f"INT8 export format must be one of {', '.join(INT8_FORMATS)}")
+    if not os.path.isdir(images_dir):
+        raise FileNotFoundError(f"Calibration directory not found: {images_dir}")
+
+    data_yaml = write_calibration_yaml(images_dir, class_names, work_dir)
+
+    logger.info(f"Calibrating INT8 {export_format} model on {images_dir}")
+    model = YOLO(model_path)
+    artifact = model.export(format=export_format, int8=True, data=data_yaml, imgsz=imgsz, fraction=fraction)
+    logger.info(f"INT8 model exported to {artifact}")
+    return artifact, data_yaml
+
+
+def main():
+    """Command line entry point for the quantization workflow."""
+    config = load_config()
+
+    parser = argparse.ArgumentParser(description="Export an INT8 vespCV model and report its accuracy drift.")
+    parser.add_argument('--model', default=config['model_path'], help="FP32 .pt weights (default: model_path from config)")
+    parser.add_argument('--data-dir', default=os.path.join('data', 'yolo_jpg_txt'), help="Collected image/label pairs")
+    parser.add_argument('--format', default='openvino', choices=INT8_FORMATS, help="INT8 export format")
+    parser.add_argument('--imgsz', type=int, default=640, help="Export and validation image size")
+    parser.add_argument('--fraction', type=float, default=1.0, help="Fraction of frames used for calibration")
+    parser.add_argument('--max-map50-drop', type=float, default=0.02, help="Largest acceptable mAP50 drop")
+    args = parser.parse_args()
+
+    # The calibration yaml is only needed for the export and the two validations
+    with tempfile.TemporaryDirectory(prefix='vespcv_calib_') as work_dir:
+        artifact, data_yaml = quantize(args.model, args.data_dir, config['class_names'], work_dir,
+                                       args.format, args.imgsz, args.fraction)
+
+        fp32_metrics = evaluate_model(args.model, data_yaml, args.imgsz)
+        int8_metrics = evaluate_model(artifact, data_yaml, args.imgsz)
+    drift = compute_drift(fp32_metrics, int8_metrics)
+    deployable = -drift['map50'] <= args.max_map50_drop
+
+    report = {
+        'fp32_model': args.model,
+        'int8_model': str(artifact),
+        'calibration_dir': args.data_dir,
+        'imgsz': args.imgsz,
+        'fp32': fp32_metrics,
+        'int8': int8_metrics,
+        'drift': drift,
+        'max_map50_drop': args.max_map50_drop,
+        'deployable': deployable,
+    }
+    report_path = os.path.join(os.path.dirname(os.path.abspath(artifact)), 'quantization_report.json')
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'metric':<12}{'fp32':>10}{'int8':>10}{'drift':>10}")
+    for key in ('map50', 'map50_95', 'precision', 'recall', 'inference_ms'):
+        print(f"{key:<12}{fp32_metrics[key]:>10.3f}{int8_metrics[key]:>10.3f}{drift[key]:>+10.3f}")
+    for name, delta in drift['per_class_ap50'].items():
+        print(f"  AP50 {name:<8}{delta:>+10.3f}")
+    print(f"Report written to {report_path}")
+    if deployable:
+        print(f"INT8 model within tolerance; set model_path to: {artifact}")
+    else:
+        print(f"INT8 model loses more than {args.max_map50_drop:.3f} mAP50; keep the FP32 model")
+    return 0 if deployable else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())